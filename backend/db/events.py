@@ -0,0 +1,255 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+from psycopg2.extensions import connection as PgConnection
+
+from .session import _get_dsn
+
+logger = logging.getLogger(__name__)
+
+
+# Delivered to every subscription after the listener (re)connects: notifications sent
+# while we were not listening are lost, so subscribers must re-read their state.
+RESYNC: Dict[str, Any] = {"resync": True}
+
+
+class Subscription:
+    """
+    One waiter on one or more channels. key=None receives every notification on them;
+    otherwise only notifications whose payload "job_id" equals key. Delivered payloads
+    carry the originating channel under "channel".
+    """
+
+    def __init__(self, listener: "NotificationListener", channels: Tuple[str, ...], key: Optional[str]) -> None:
+        self.channels = channels
+        self.key = key
+        self._listener = listener
+        self._q: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+    def _deliver(self, payload: Dict[str, Any]) -> None:
+        self._q.put(payload)
+
+    def wait(self, timeout: Optional[float]) -> Optional[Dict[str, Any]]:
+        """
+        Blocks until a notification arrives; returns its payload, or None on timeout.
+        """
+        try:
+            return self._q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def wake(self) -> None:
+        """
+        Unblocks a pending wait() without a database notification (e.g. on shutdown).
+        """
+        self._q.put({"wake": True})
+
+    def drain(self) -> int:
+        """
+        Discards queued notifications; returns how many were dropped.
+        """
+        n = 0
+        while True:
+            try:
+                self._q.get_nowait()
+            except queue.Empty:
+                return n
+            n += 1
+
+    def close(self) -> None:
+        self._listener._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class NotificationListener:
+    """
+    One dedicated LISTEN connection per process, fanned out to in-process subscribers.
+    The connection lives outside the pool: it is held for the process lifetime and
+    must stay in autocommit mode for notifications to be delivered.
+    """
+
+    def __init__(self, *, reconnect_delay_s: float = 1.0) -> None:
+        self._reconnect_delay_s = reconnect_delay_s
+        self._lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._conn: Optional[PgConnection] = None
+        self._channels: Set[str] = set()
+        self._subs: Dict[str, List[Subscription]] = {}
+        # Set once a channel's LISTEN has run on the current connection; cleared on disconnect.
+        self._listening: Dict[str, threading.Event] = {}
+        self._connected = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pg-listener", daemon=True)
+        self._thread.start()
+
+    # ---------- subscriber API ----------
+
+    def subscribe(self, *channels: str, key: Optional[str] = None, timeout: float = 10.0) -> Subscription:
+        """
+        Registers a subscription and returns once the channels are actually LISTENed on,
+        so a caller can subscribe first and then read current state without a gap.
+        """
+        if not channels:
+            raise ValueError("subscribe() needs at least one channel")
+        deadline = time.monotonic() + timeout
+        sub = Subscription(self, tuple(channels), key)
+        with self._lock:
+            new_channels = [c for c in channels if c not in self._channels]
+            for channel in channels:
+                self._subs.setdefault(channel, []).append(sub)
+                self._channels.add(channel)
+                self._listening.setdefault(channel, threading.Event())
+            events = [self._listening[c] for c in channels]
+
+        if not self._connected.wait(timeout):
+            self._unsubscribe(sub)
+            raise RuntimeError("LISTEN connection is not available")
+
+        for channel in new_channels:
+            try:
+                self._listen(channel)
+            except Exception:
+                # The run loop reconnects and re-LISTENs every known channel.
+                logger.warning(f"LISTEN {channel} failed, waiting for listener reconnect", exc_info=True)
+
+        # A channel another subscriber just added may still have its LISTEN in flight.
+        for event in events:
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                self._unsubscribe(sub)
+                raise RuntimeError("LISTEN did not complete in time")
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for channel in sub.channels:
+                subs = self._subs.get(channel) or []
+                if sub in subs:
+                    subs.remove(sub)
+
+    # ---------- listener thread ----------
+
+    def _listen(self, channel: str) -> None:
+        with self._conn_lock:
+            conn = self._conn
+            if conn is None or conn.closed:
+                return
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{channel}"')
+            self._set_listening([channel])
+            # Notifications read off the socket along with the LISTEN reply are already
+            # in conn.notifies; the run loop's select() would not see them until its timeout.
+            notifies = self._take_notifies(conn)
+        self._dispatch(notifies)
+
+    def _connect(self) -> Tuple[PgConnection, List[str]]:
+        conn = psycopg2.connect(_get_dsn())
+        conn.autocommit = True
+        with self._lock:
+            channels = list(self._channels)
+        with conn.cursor() as cur:
+            for channel in channels:
+                cur.execute(f'LISTEN "{channel}"')
+        return conn, channels
+
+    def _set_listening(self, channels: List[str]) -> None:
+        # Caller holds _conn_lock, so this cannot interleave with a disconnect's clear.
+        with self._lock:
+            for channel in channels:
+                self._listening[channel].set()
+
+    def _fan_out(self, channel: str, payload: Dict[str, Any]) -> None:
+        key = payload.get("job_id")
+        with self._lock:
+            subs = list(self._subs.get(channel) or [])
+        for sub in subs:
+            if sub.key is None or sub.key == key:
+                sub._deliver(payload)
+
+    def _broadcast(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            subs = list({id(s): s for group in self._subs.values() for s in group}.values())
+        for sub in subs:
+            sub._deliver(payload)
+
+    @staticmethod
+    def _take_notifies(conn: PgConnection) -> List[Any]:
+        # Caller holds _conn_lock.
+        conn.poll()
+        notifies = list(conn.notifies)
+        conn.notifies.clear()
+        return notifies
+
+    def _dispatch(self, notifies: List[Any]) -> None:
+        for n in notifies:
+            try:
+                payload = json.loads(n.payload) if n.payload else {}
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                payload = {"raw": n.payload}
+            payload["channel"] = n.channel
+            self._fan_out(n.channel, payload)
+
+    def _run(self) -> None:
+        first = True
+        while True:
+            try:
+                conn, channels = self._connect()
+            except Exception:
+                logger.warning("LISTEN connection failed, retrying", exc_info=True)
+                time.sleep(self._reconnect_delay_s)
+                continue
+
+            with self._conn_lock:
+                self._conn = conn
+                self._set_listening(channels)
+            self._connected.set()
+            if not first:
+                self._broadcast(RESYNC)
+            first = False
+
+            try:
+                while True:
+                    # Drain before blocking: _connect's LISTENs may already have read some.
+                    with self._conn_lock:
+                        notifies = self._take_notifies(conn)
+                    self._dispatch(notifies)
+                    select.select([conn], [], [], 5.0)
+            except Exception:
+                logger.warning("LISTEN connection lost, reconnecting", exc_info=True)
+            finally:
+                self._connected.clear()
+                with self._conn_lock:
+                    self._conn = None
+                    with self._lock:
+                        for event in self._listening.values():
+                            event.clear()
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            time.sleep(self._reconnect_delay_s)
+
+
+_listener: Optional[NotificationListener] = None
+_listener_lock = threading.Lock()
+
+
+def get_listener() -> NotificationListener:
+    global _listener
+    if _listener is not None:
+        return _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = NotificationListener()
+    return _listener
@@ -1,16 +1,49 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
-from psycopg2.extras import RealDictCursor
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
 
 from .session import get_conn
 
 
 JOB_TABLE = "public.dah_jobs"
 
+# NOTIFY channel for job status changes; payload is {"job_id": ..., "status": ...}.
+# Kept small on purpose (NOTIFY payloads are capped at 8000 bytes): listeners re-read the row.
+JOB_EVENTS_CHANNEL = "dah_job_events"
+
+# NOTIFY channel for partial LLM output while a job runs (ENABLE_TOKEN_STREAMING);
+# payload is {"job_id": ..., "seq": n, "text": "..."}. Not persisted: the full text is
+# stored once by set_job_done.
+JOB_TOKENS_CHANNEL = "dah_job_tokens"
+
+# NOTIFY payloads are limited to 8000 bytes; 1000 characters stays under that even
+# when every character is a 4-byte UTF-8 sequence or a JSON escape.
+JOB_TOKENS_MAX_CHARS = 1000
+
+# NOTIFY channel signalled by create_job so idle workers wake up immediately.
+JOB_QUEUED_CHANNEL = "dah_job_queued"
+
+# Retrieval chunks of Docmost pages with their embeddings. One page version per
+# (page_id, embed_model): a newer version replaces all chunks of the older one.
+PAGE_CHUNKS_TABLE = "public.dah_page_chunks"
+
+# Per-(space, embed model) counter bumped by every upsert_page_chunks commit; the change
+# detector for in-process vector matrices (timestamps cannot order concurrent commits).
+PAGE_CHUNK_VERSIONS_TABLE = "public.dah_page_chunk_versions"
+
+# Local copy of Docmost pages (normalized text_content), kept current by backend.sync.
+# Soft-deleted pages stay as rows with deleted_at set and no text.
+MIRROR_TABLE = "public.dah_page_mirror"
+
+# Per-sync progress: the (changed_at, id) position of the last applied change.
+SYNC_STATE_TABLE = "public.dah_sync_state"
+
 
 @dataclass(frozen=True)
 class JobRow:
@@ -24,9 +57,19 @@ class JobRow:
     created_at: Optional[str]  # ISO-ish string from DB driver, used only for ordering/visibility
 
 
+@dataclass(frozen=True)
+class PageChunkRow:
+    page_id: str
+    page_version: str
+    chunk_index: int
+    chunk_text: str
+    embedding: bytes  # float32 little-endian, L2-normalized
+
+
 def ensure_schema() -> None:
     """
-    Creates the single MVP table if missing.
+    Creates the job, retrieval chunk (and per-space chunk version), page mirror and
+    sync-state tables if missing.
     This keeps schema in the repo layer (SQL-only rule).
     """
     sql = f"""
@@ -48,6 +91,64 @@ def ensure_schema() -> None:
 
     CREATE INDEX IF NOT EXISTS dah_jobs_status_created_idx
       ON {JOB_TABLE} (status, created_at);
+
+    -- What the prompt builder kept/dropped to fit the context budget.
+    ALTER TABLE {JOB_TABLE} ADD COLUMN IF NOT EXISTS prompt_stats JSONB NULL;
+
+    -- Hash of everything that determines the answer; done jobs are reused by it.
+    ALTER TABLE {JOB_TABLE} ADD COLUMN IF NOT EXISTS fingerprint TEXT NULL;
+
+    CREATE INDEX IF NOT EXISTS dah_jobs_fingerprint_created_idx
+      ON {JOB_TABLE} (fingerprint, created_at)
+      WHERE fingerprint IS NOT NULL;
+
+    CREATE TABLE IF NOT EXISTS {PAGE_CHUNKS_TABLE} (
+        page_id UUID NOT NULL,
+        embed_model TEXT NOT NULL,
+        chunk_index INT NOT NULL,
+        space_id UUID NULL,
+        page_version TEXT NOT NULL,
+        chunk_text TEXT NOT NULL,
+        dims INT NOT NULL,
+        embedding BYTEA NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (page_id, embed_model, chunk_index)
+    );
+
+    -- Whole-space vector loads (vector_index) and their fingerprint.
+    CREATE INDEX IF NOT EXISTS dah_page_chunks_space_model_idx
+      ON {PAGE_CHUNKS_TABLE} (space_id, embed_model);
+
+    CREATE TABLE IF NOT EXISTS {PAGE_CHUNK_VERSIONS_TABLE} (
+        space_id UUID NOT NULL,
+        embed_model TEXT NOT NULL,
+        version BIGINT NOT NULL DEFAULT 1,
+        PRIMARY KEY (space_id, embed_model)
+    );
+
+    CREATE TABLE IF NOT EXISTS {MIRROR_TABLE} (
+        page_id UUID PRIMARY KEY,
+        space_id UUID NULL,
+        title TEXT NULL,
+        parent_page_id UUID NULL,
+        creator_id UUID NULL,
+        created_at TIMESTAMPTZ NULL,
+        updated_at TIMESTAMPTZ NULL,
+        deleted_at TIMESTAMPTZ NULL,
+        version TEXT NULL,
+        text_content TEXT NULL,
+        synced_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+
+    CREATE INDEX IF NOT EXISTS dah_page_mirror_space_idx
+      ON {MIRROR_TABLE} (space_id);
+
+    CREATE TABLE IF NOT EXISTS {SYNC_STATE_TABLE} (
+        name TEXT PRIMARY KEY,
+        watermark_changed_at TIMESTAMPTZ NULL,
+        watermark_id UUID NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
     """
     with get_conn() as conn:
         with conn.cursor() as cur:
@@ -72,13 +173,15 @@ def create_job(*, status: str, space_id: Optional[UUID], selected_page_ids: List
                 },
             )
             row = cur.fetchone()
+            _notify_job_event(cur, job_id=row[0], status=status, channel=JOB_QUEUED_CHANNEL)
             return row[0]
 
 
 def claim_next_job(*, from_status: str, to_status: str) -> Optional[JobRow]:
     """
     Oldest-first claim using created_at.
-    Concurrency=1 for MVP, but this still uses SKIP LOCKED to be safe if later increased.
+    The worker's slot threads (WORKER_CONCURRENCY) claim concurrently; SKIP LOCKED lets
+    each take a different row instead of queueing on the same one.
     """
     sql = f"""
     WITH picked AS (
@@ -101,20 +204,50 @@ def claim_next_job(*, from_status: str, to_status: str) -> Optional[JobRow]:
             r = cur.fetchone()
             if not r:
                 return None
-            return _row_to_job(r)
+            job = _row_to_job(r)
+            # Delivered on commit, together with the claim.
+            _notify_job_event(cur, job_id=job.id, status=job.status)
+            return job
 
 
-def set_job_done(*, job_id: UUID, status: str, final_text: str) -> None:
+def set_job_done(*, job_id: UUID, status: str, final_text: str, fingerprint: Optional[str] = None) -> None:
     sql = f"""
     UPDATE {JOB_TABLE}
     SET status = %(status)s,
         final_text = %(final_text)s,
-        error_text = NULL
+        error_text = NULL,
+        fingerprint = %(fingerprint)s
     WHERE id = %(id)s
     """
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, {"id": str(job_id), "status": status, "final_text": final_text})
+            cur.execute(
+                sql,
+                {"id": str(job_id), "status": status, "final_text": final_text, "fingerprint": fingerprint},
+            )
+            _notify_job_event(cur, job_id=job_id, status=status)
+
+
+def find_memoized_result(*, fingerprint: str, status: str, max_age_s: float) -> Optional[Tuple[UUID, str]]:
+    """
+    (job id, final_text) of the newest job in status with this fingerprint created
+    within max_age_s, or None.
+    """
+    sql = f"""
+    SELECT id, final_text
+    FROM {JOB_TABLE}
+    WHERE fingerprint = %(fingerprint)s
+      AND status = %(status)s
+      AND final_text IS NOT NULL
+      AND created_at > now() - make_interval(secs => %(max_age_s)s)
+    ORDER BY created_at DESC
+    LIMIT 1
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, {"fingerprint": fingerprint, "status": status, "max_age_s": float(max_age_s)})
+            row = cur.fetchone()
+            return (row[0], row[1]) if row else None
 
 
 def set_job_failed(*, job_id: UUID, status: str, error_text: str) -> None:
@@ -127,6 +260,18 @@ def set_job_failed(*, job_id: UUID, status: str, error_text: str) -> None:
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(sql, {"id": str(job_id), "status": status, "error_text": error_text})
+            _notify_job_event(cur, job_id=job_id, status=status)
+
+
+def set_job_prompt_stats(*, job_id: UUID, prompt_stats: Dict[str, Any]) -> None:
+    sql = f"""
+    UPDATE {JOB_TABLE}
+    SET prompt_stats = %(prompt_stats)s::jsonb
+    WHERE id = %(id)s
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, {"id": str(job_id), "prompt_stats": json.dumps(prompt_stats)})
 
 
 def get_job(*, job_id: UUID) -> Optional[JobRow]:
@@ -145,6 +290,316 @@ def get_job(*, job_id: UUID) -> Optional[JobRow]:
             return _row_to_job(r)
 
 
+def publish_job_tokens(*, job_id: UUID, seq: int, text: str) -> int:
+    """
+    Sends partial output for a running job, split to fit NOTIFY's payload limit.
+    Returns the next sequence number.
+    """
+    sql = "SELECT pg_notify(%(channel)s, %(payload)s)"
+    with get_conn(autocommit=True) as conn:
+        with conn.cursor() as cur:
+            for i in range(0, len(text), JOB_TOKENS_MAX_CHARS):
+                cur.execute(
+                    sql,
+                    {
+                        "channel": JOB_TOKENS_CHANNEL,
+                        "payload": json.dumps(
+                            {"job_id": str(job_id), "seq": seq, "text": text[i:i + JOB_TOKENS_MAX_CHARS]},
+                            ensure_ascii=False,
+                        ),
+                    },
+                )
+                seq += 1
+    return seq
+
+
+def count_jobs_by_status() -> Dict[str, int]:
+    """
+    Job counts per status; "running" is the number of jobs in flight across all workers.
+    """
+    sql = f"""
+    SELECT status, count(*) AS n
+    FROM {JOB_TABLE}
+    GROUP BY status
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            return {str(status): int(n) for status, n in cur.fetchall()}
+
+
+def get_page_chunks(*, page_ids: Sequence[str], embed_model: str) -> List[PageChunkRow]:
+    """
+    Stored chunks of the given pages for embed_model, ordered by page and chunk index.
+    Callers compare page_version with the page they hold before trusting them.
+    """
+    if not page_ids:
+        return []
+    sql = f"""
+    SELECT page_id, page_version, chunk_index, chunk_text, embedding
+    FROM {PAGE_CHUNKS_TABLE}
+    WHERE page_id = ANY(%(page_ids)s::uuid[])
+      AND embed_model = %(embed_model)s
+    ORDER BY page_id, chunk_index
+    """
+    with get_conn() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(sql, {"page_ids": [str(x) for x in page_ids], "embed_model": embed_model})
+            return [
+                PageChunkRow(
+                    page_id=str(r["page_id"]),
+                    page_version=str(r["page_version"]),
+                    chunk_index=int(r["chunk_index"]),
+                    chunk_text=str(r["chunk_text"]),
+                    embedding=bytes(r["embedding"]),
+                )
+                for r in cur.fetchall()
+            ]
+
+
+def upsert_page_chunks(
+    *,
+    page_id: str,
+    space_id: Optional[str],
+    page_version: str,
+    embed_model: str,
+    dims: int,
+    chunks: Sequence[Tuple[str, bytes]],
+) -> None:
+    """
+    Stores the chunks (text, float32 embedding bytes) of one page version, replacing
+    whatever was stored for that page and model before, in one transaction.
+    Vectors are searched in-process (see db.vector_index), so no extension is needed.
+    Bumps the chunk version of every space touched (old and new) in the same transaction.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                DELETE FROM {PAGE_CHUNKS_TABLE}
+                WHERE page_id = %(page_id)s AND embed_model = %(embed_model)s
+                RETURNING space_id
+                """,
+                {"page_id": str(page_id), "embed_model": embed_model},
+            )
+            spaces = {str(r[0]) for r in cur.fetchall() if r[0] is not None}
+            if chunks:
+                execute_values(
+                    cur,
+                    f"""
+                    INSERT INTO {PAGE_CHUNKS_TABLE}
+                        (page_id, embed_model, chunk_index, space_id, page_version, chunk_text, dims, embedding)
+                    VALUES %s
+                    """,
+                    [
+                        (str(page_id), embed_model, i, space_id, page_version, text, dims, psycopg2.Binary(blob))
+                        for i, (text, blob) in enumerate(chunks)
+                    ],
+                )
+                if space_id is not None:
+                    spaces.add(str(space_id))
+            if spaces:
+                # Sorted so concurrent upserts lock version rows in the same order.
+                execute_values(
+                    cur,
+                    f"""
+                    INSERT INTO {PAGE_CHUNK_VERSIONS_TABLE} AS v (space_id, embed_model)
+                    VALUES %s
+                    ON CONFLICT (space_id, embed_model) DO UPDATE SET version = v.version + 1
+                    """,
+                    [(sid, embed_model) for sid in sorted(spaces)],
+                )
+
+
+def page_chunks_fingerprint(*, space_id: str, embed_model: str) -> Tuple[int, Optional[str]]:
+    """
+    (row count, chunk version) of a space's chunks; the version changes with every
+    committed upsert_page_chunks that touches the space.
+    """
+    sql = f"""
+    SELECT
+        (SELECT count(*) FROM {PAGE_CHUNKS_TABLE}
+         WHERE space_id = %(space_id)s AND embed_model = %(embed_model)s) AS n,
+        (SELECT version FROM {PAGE_CHUNK_VERSIONS_TABLE}
+         WHERE space_id = %(space_id)s AND embed_model = %(embed_model)s) AS version
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, {"space_id": str(space_id), "embed_model": embed_model})
+            n, version = cur.fetchone()
+            return int(n), str(version) if version is not None else None
+
+
+def load_space_chunk_vectors(*, space_id: str, embed_model: str) -> List[Tuple[str, int, int, bytes]]:
+    """
+    Every stored chunk vector of a space: [(page_id, chunk_index, dims, embedding), ...].
+    Texts are left out; callers that rank chunks already hold the texts of their pages.
+    """
+    sql = f"""
+    SELECT page_id, chunk_index, dims, embedding
+    FROM {PAGE_CHUNKS_TABLE}
+    WHERE space_id = %(space_id)s
+      AND embed_model = %(embed_model)s
+    ORDER BY page_id, chunk_index
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, {"space_id": str(space_id), "embed_model": embed_model})
+            return [(str(pid), int(idx), int(dims), bytes(emb)) for pid, idx, dims, emb in cur.fetchall()]
+
+
+def top_k_page_chunks(
+    *,
+    space_id: str,
+    embed_model: str,
+    query: Sequence[float],
+    k: int,
+    page_ids: Optional[Sequence[str]] = None,
+) -> List[Tuple[float, str, int]]:
+    """
+    Best k stored chunks of a space for a query embedding (cosine), optionally limited
+    to page_ids: [(score, page_id, chunk_index), ...]. Runs against the cached
+    per-space matrix in db.vector_index.
+    """
+    from .vector_index import from_vector_bytes, get_vector_index, to_vector_bytes
+
+    return get_vector_index().top_k(
+        space_id=space_id,
+        embed_model=embed_model,
+        query=from_vector_bytes(to_vector_bytes(query)),
+        k=k,
+        page_ids=page_ids,
+    )
+
+
+def get_sync_watermark(*, name: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    (changed_at ISO string, page id) of the last change applied by sync `name`, or None.
+    """
+    sql = f"""
+    SELECT watermark_changed_at, watermark_id
+    FROM {SYNC_STATE_TABLE}
+    WHERE name = %(name)s
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, {"name": name})
+            row = cur.fetchone()
+            if not row or row[0] is None:
+                return None
+            return row[0].isoformat(), str(row[1]) if row[1] else None
+
+
+def apply_mirror_changes(
+    *, name: str, pages: Sequence[Dict[str, Any]], watermark: Tuple[str, str]
+) -> int:
+    """
+    Upserts a batch from the fetcher change feed into the mirror and advances the sync
+    watermark in the same transaction, so a crash never skips or half-applies a batch.
+    Rows whose version and deleted_at did not change are left alone.
+    Returns the number of mirror rows written.
+    """
+    upsert = f"""
+    INSERT INTO {MIRROR_TABLE}
+        (page_id, space_id, title, parent_page_id, creator_id,
+         created_at, updated_at, deleted_at, version, text_content, synced_at)
+    VALUES %s
+    ON CONFLICT (page_id) DO UPDATE SET
+        space_id = EXCLUDED.space_id,
+        title = EXCLUDED.title,
+        parent_page_id = EXCLUDED.parent_page_id,
+        creator_id = EXCLUDED.creator_id,
+        created_at = EXCLUDED.created_at,
+        updated_at = EXCLUDED.updated_at,
+        deleted_at = EXCLUDED.deleted_at,
+        version = EXCLUDED.version,
+        text_content = EXCLUDED.text_content,
+        synced_at = now()
+    WHERE {MIRROR_TABLE}.version IS DISTINCT FROM EXCLUDED.version
+       OR {MIRROR_TABLE}.deleted_at IS DISTINCT FROM EXCLUDED.deleted_at
+    """
+    state = f"""
+    INSERT INTO {SYNC_STATE_TABLE} (name, watermark_changed_at, watermark_id, updated_at)
+    VALUES (%(name)s, %(changed_at)s, %(id)s, now())
+    ON CONFLICT (name) DO UPDATE SET
+        watermark_changed_at = EXCLUDED.watermark_changed_at,
+        watermark_id = EXCLUDED.watermark_id,
+        updated_at = now()
+    """
+    written = 0
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if pages:
+                execute_values(
+                    cur,
+                    upsert,
+                    [
+                        (
+                            p["id"], p.get("space_id"), p.get("title"), p.get("parent_page_id"), p.get("creator_id"),
+                            p.get("created_at"), p.get("updated_at"), p.get("deleted_at"),
+                            p.get("version"), None if p.get("deleted_at") else p.get("text_content"),
+                        )
+                        for p in pages
+                    ],
+                    template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now())",
+                    # One statement for the whole batch, so rowcount covers all of it.
+                    page_size=len(pages),
+                )
+                written = cur.rowcount
+            cur.execute(state, {"name": name, "changed_at": watermark[0], "id": watermark[1]})
+    return written
+
+
+def get_mirror_pages(*, page_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Live mirrored pages as {page_id: {"ok": True, "page": {...}}}, the shape the fetcher
+    client returns; deleted or not-yet-mirrored pages are absent.
+    """
+    if not page_ids:
+        return {}
+    sql = f"""
+    SELECT page_id, space_id, title, parent_page_id, creator_id,
+           created_at, updated_at, version, text_content
+    FROM {MIRROR_TABLE}
+    WHERE page_id = ANY(%(page_ids)s::uuid[])
+      AND deleted_at IS NULL
+    """
+    with get_conn() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(sql, {"page_ids": [str(x) for x in page_ids]})
+            out: Dict[str, Dict[str, Any]] = {}
+            for r in cur.fetchall():
+                pid = str(r["page_id"])
+                out[pid] = {
+                    "ok": True,
+                    "page": {
+                        "id": pid,
+                        "space_id": str(r["space_id"]) if r["space_id"] else None,
+                        "title": r["title"],
+                        "parent_page_id": str(r["parent_page_id"]) if r["parent_page_id"] else None,
+                        "creator_id": str(r["creator_id"]) if r["creator_id"] else None,
+                        "created_at": r["created_at"].isoformat() if r["created_at"] else None,
+                        "updated_at": r["updated_at"].isoformat() if r["updated_at"] else None,
+                        "version": r["version"],
+                        "text_content": r["text_content"],
+                    },
+                }
+            return out
+
+
+def _notify_job_event(cur: Any, *, job_id: UUID, status: str, channel: str = JOB_EVENTS_CHANNEL) -> None:
+    """
+    Queues a NOTIFY on the caller's transaction; Postgres only delivers it on commit.
+    """
+    cur.execute(
+        "SELECT pg_notify(%(channel)s, %(payload)s)",
+        {
+            "channel": channel,
+            "payload": json.dumps({"job_id": str(job_id), "status": status}),
+        },
+    )
+
+
 def _row_to_job(r: Dict[str, Any]) -> JobRow:
     return JobRow(
         id=UUID(str(r["id"])),
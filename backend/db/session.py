@@ -1,8 +1,11 @@
 import os
+import threading
+import time
 from contextlib import contextmanager
-from typing import Iterator, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extensions import connection as PgConnection
 
 
@@ -13,23 +16,315 @@ def _get_dsn() -> str:
     return dsn
 
 
+def _env_int(name: str, default: int) -> int:
+    raw = (os.getenv(name) or "").strip()
+    return int(raw) if raw else default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = (os.getenv(name) or "").strip()
+    return float(raw) if raw else default
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class _PooledConn:
+    __slots__ = ("conn", "created_at", "last_used_at")
+
+    def __init__(self, conn: PgConnection) -> None:
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 pool shared by the Flask app and the worker.
+
+    - min_size connections are opened when the pool is created and kept warm.
+    - max_size caps open connections; callers block up to timeout_s when saturated.
+    - Connections older than max_lifetime_s are recycled on checkout/checkin.
+    - Connections idle longer than health_check_idle_s are pinged (SELECT 1) on checkout.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        min_size: int,
+        max_size: int,
+        timeout_s: float,
+        max_lifetime_s: float,
+        health_check_idle_s: float,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self._dsn = dsn
+        self._min_size = max(0, min(min_size, max_size))
+        self._max_size = max_size
+        self._timeout_s = timeout_s
+        self._max_lifetime_s = max_lifetime_s
+        self._health_check_idle_s = health_check_idle_s
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledConn] = []
+        self._in_use: Dict[int, _PooledConn] = {}
+        self._opening = 0
+
+        # Counters (read through stats()).
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total_s = 0.0
+        self._wait_time_max_s = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._health_failures = 0
+
+    # ---------- internals ----------
+
+    def _open(self) -> _PooledConn:
+        conn = psycopg2.connect(self._dsn)
+        return _PooledConn(conn)
+
+    def _is_expired(self, pc: _PooledConn, now: float) -> bool:
+        return self._max_lifetime_s > 0 and (now - pc.created_at) >= self._max_lifetime_s
+
+    def _is_healthy(self, pc: _PooledConn, now: float) -> bool:
+        if pc.conn.closed:
+            return False
+        if self._health_check_idle_s < 0 or (now - pc.last_used_at) < self._health_check_idle_s:
+            return True
+        try:
+            pc.conn.autocommit = True
+            with pc.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(pc: _PooledConn) -> None:
+        try:
+            pc.conn.close()
+        except Exception:
+            pass
+
+    def _total_locked(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    # ---------- public ----------
+
+    def getconn(self) -> PgConnection:
+        started = time.monotonic()
+        deadline = started + self._timeout_s
+        waited = False
+
+        while True:
+            candidate: Optional[_PooledConn] = None
+            should_open = False
+
+            with self._cond:
+                while True:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        # Count it as in use while we vet it, so max_size holds.
+                        self._in_use[id(candidate.conn)] = candidate
+                        break
+                    if self._total_locked() < self._max_size:
+                        self._opening += 1
+                        should_open = True
+                        break
+
+                    if not waited:
+                        waited = True
+                        self._waits += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self._timeout_s:.1f}s waiting for a DB connection "
+                            f"(max_size={self._max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            now = time.monotonic()
+
+            if should_open:
+                try:
+                    candidate = self._open()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                # Same critical section: the new connection is never uncounted.
+                with self._cond:
+                    self._opening -= 1
+                    self._created += 1
+                    self._in_use[id(candidate.conn)] = candidate
+            elif candidate is not None and (self._is_expired(candidate, now) or not self._is_healthy(candidate, now)):
+                expired = self._is_expired(candidate, now)
+                self._discard(candidate)
+                with self._cond:
+                    self._in_use.pop(id(candidate.conn), None)
+                    if expired:
+                        self._recycled += 1
+                    else:
+                        self._health_failures += 1
+                    self._cond.notify()
+                continue
+
+            assert candidate is not None
+            with self._cond:
+                self._checkouts += 1
+                if waited:
+                    wait_s = time.monotonic() - started
+                    self._wait_time_total_s += wait_s
+                    self._wait_time_max_s = max(self._wait_time_max_s, wait_s)
+            return candidate.conn
+
+    def putconn(self, conn: PgConnection, *, discard: bool = False) -> None:
+        with self._cond:
+            pc = self._in_use.pop(id(conn), None)
+        if pc is None:
+            # Not ours (or already returned); never leak it.
+            self._discard(_PooledConn(conn))
+            return
+
+        now = time.monotonic()
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                conn.autocommit = False
+            except Exception:
+                discard = True
+
+        if discard or conn.closed or self._is_expired(pc, now):
+            if not discard and not conn.closed:
+                with self._cond:
+                    self._recycled += 1
+            self._discard(pc)
+            with self._cond:
+                self._cond.notify()
+            return
+
+        pc.last_used_at = now
+        with self._cond:
+            self._idle.append(pc)
+            self._cond.notify()
+
+    def prefill(self) -> None:
+        """
+        Opens connections until min_size is reached. Safe to call repeatedly.
+        """
+        while True:
+            with self._cond:
+                if self._total_locked() >= self._min_size:
+                    return
+                self._opening += 1
+            try:
+                pc = self._open()
+            except Exception:
+                with self._cond:
+                    self._opening -= 1
+                raise
+            with self._cond:
+                self._opening -= 1
+                self._created += 1
+                self._idle.append(pc)
+                self._cond.notify()
+
+    def closeall(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for pc in idle:
+            self._discard(pc)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self._min_size,
+                "max_size": self._max_size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "opening": self._opening,
+                "checkouts": self._checkouts,
+                # Checkouts that found the pool saturated and had to wait.
+                "waits": self._waits,
+                "saturation": round(len(self._in_use) / self._max_size, 3),
+                "timeouts": self._timeouts,
+                "wait_time_total_ms": round(self._wait_time_total_s * 1000.0, 3),
+                "wait_time_max_ms": round(self._wait_time_max_s * 1000.0, 3),
+                "wait_time_avg_ms": round((self._wait_time_total_s / self._waits) * 1000.0, 3) if self._waits else 0.0,
+                "created": self._created,
+                "recycled": self._recycled,
+                "health_failures": self._health_failures,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Process-wide pool, created on first use from env:
+      DAH_DB_POOL_MIN (default 1), DAH_DB_POOL_MAX (default 10),
+      DAH_DB_POOL_TIMEOUT_S (default 10), DAH_DB_POOL_MAX_LIFETIME_S (default 1800, 0 = never),
+      DAH_DB_POOL_HEALTH_CHECK_IDLE_S (default 30, -1 = never ping).
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = ConnectionPool(
+                _get_dsn(),
+                min_size=_env_int("DAH_DB_POOL_MIN", 1),
+                max_size=_env_int("DAH_DB_POOL_MAX", 10),
+                timeout_s=_env_float("DAH_DB_POOL_TIMEOUT_S", 10.0),
+                max_lifetime_s=_env_float("DAH_DB_POOL_MAX_LIFETIME_S", 1800.0),
+                health_check_idle_s=_env_float("DAH_DB_POOL_HEALTH_CHECK_IDLE_S", 30.0),
+            )
+            pool.prefill()
+            _pool = pool
+    return _pool
+
+
+def pool_stats() -> Dict[str, Any]:
+    return get_pool().stats()
+
+
 @contextmanager
 def get_conn(*, autocommit: bool = False) -> Iterator[PgConnection]:
     """
-    Application DB connection only.
-    No pooling in MVP. Caller controls transaction boundaries via commit/rollback.
+    Application DB connection only, checked out from the shared pool.
+    Caller controls transaction boundaries via commit/rollback; on success we commit,
+    on error we roll back, and the connection always goes back to the pool.
     """
+    pool = get_pool()
     conn: Optional[PgConnection] = None
+    broken = False
     try:
-        conn = psycopg2.connect(_get_dsn())
+        conn = pool.getconn()
         conn.autocommit = autocommit
         yield conn
         if not autocommit:
             conn.commit()
     except Exception:
-        if conn is not None and not conn.autocommit:
-            conn.rollback()
+        if conn is not None and not conn.closed and not conn.autocommit:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        if conn is not None and conn.closed:
+            broken = True
         raise
     finally:
         if conn is not None:
-            conn.close()
+            pool.putconn(conn, discard=broken)
@@ -0,0 +1,193 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import repo
+
+logger = logging.getLogger(__name__)
+
+
+# Embeddings are stored as little-endian float32 (dah_page_chunks.embedding).
+VECTOR_DTYPE = np.dtype("<f4")
+
+
+def to_vector_bytes(vector: Sequence[float]) -> bytes:
+    """
+    L2-normalized float32 bytes, so cosine similarity is a plain dot product.
+    """
+    v = np.asarray(vector, dtype=VECTOR_DTYPE)
+    norm = float(np.linalg.norm(v)) or 1.0
+    return (v / norm).astype(VECTOR_DTYPE, copy=False).tobytes()
+
+
+def from_vector_bytes(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=VECTOR_DTYPE)
+
+
+def top_k_rows(
+    vectors: np.ndarray, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices and scores of the k rows of vectors (n, d) with the highest dot product with
+    query (d,), best first. One matrix-vector product plus argpartition; rows where mask
+    is False are never returned.
+    """
+    if vectors.shape[0] == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=VECTOR_DTYPE)
+
+    scores = vectors @ query
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+        k = min(k, int(mask.sum()))
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=VECTOR_DTYPE)
+
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    return idx, scores[idx]
+
+
+@dataclass(frozen=True)
+class _SpaceMatrix:
+    fingerprint: Tuple[int, Optional[str]]
+    page_ids: np.ndarray     # str, one per row
+    chunk_index: np.ndarray  # int32, one per row
+    vectors: np.ndarray      # float32 (rows, dims), L2-normalized
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.vectors.nbytes + self.page_ids.nbytes + self.chunk_index.nbytes)
+
+
+class VectorIndex:
+    """
+    In-process, per-(space, embed model) matrices of the chunk embeddings stored in
+    dah_page_chunks. Plain Postgres holds the vectors; similarity runs here, vectorized.
+    A matrix is rebuilt when the space's chunk fingerprint (row count, chunk version)
+    changes, so upserts by other workers are picked up on the next query.
+    Bounded LRU over spaces by VECTOR_INDEX_MAX_SPACES and VECTOR_INDEX_MAX_BYTES; a
+    matrix larger than the byte cap on its own is served but not kept.
+    """
+
+    def __init__(self, *, max_spaces: int, max_bytes: int) -> None:
+        self._max_spaces = max_spaces
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._matrices: "OrderedDict[Tuple[str, str], _SpaceMatrix]" = OrderedDict()
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.uncached = 0
+
+    def _load(self, space_id: str, embed_model: str, fingerprint: Tuple[int, Optional[str]]) -> _SpaceMatrix:
+        rows = repo.load_space_chunk_vectors(space_id=space_id, embed_model=embed_model)
+        # A model switch can leave rows of another width behind; keep the dominant one.
+        dims = max({r[2] for r in rows}, key=lambda d: sum(1 for r in rows if r[2] == d)) if rows else 0
+        rows = [r for r in rows if r[2] == dims]
+
+        vectors = np.frombuffer(b"".join(r[3] for r in rows), dtype=VECTOR_DTYPE)
+        return _SpaceMatrix(
+            fingerprint=fingerprint,
+            page_ids=np.array([r[0] for r in rows], dtype=str),
+            chunk_index=np.array([r[1] for r in rows], dtype=np.int32),
+            vectors=vectors.reshape(len(rows), dims) if rows else np.empty((0, 0), dtype=VECTOR_DTYPE),
+        )
+
+    def _evict(self) -> None:
+        total = sum(m.nbytes for m in self._matrices.values())
+        while self._matrices and (
+            len(self._matrices) > self._max_spaces
+            or (self._max_bytes > 0 and total > self._max_bytes)
+        ):
+            _, dropped = self._matrices.popitem(last=False)
+            total -= dropped.nbytes
+            self.evictions += 1
+
+    def matrix(self, *, space_id: str, embed_model: str) -> _SpaceMatrix:
+        key = (str(space_id), embed_model)
+        fingerprint = repo.page_chunks_fingerprint(space_id=key[0], embed_model=embed_model)
+        with self._lock:
+            cached = self._matrices.get(key)
+            if cached is not None and cached.fingerprint == fingerprint:
+                self._matrices.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        # Built outside the lock; two threads may load the same space once, which is harmless.
+        built = self._load(key[0], embed_model, fingerprint)
+        with self._lock:
+            self.loads += 1
+            if self._max_bytes > 0 and built.nbytes > self._max_bytes:
+                # Caching it would only evict everything else and then itself.
+                self.uncached += 1
+            elif self._max_spaces > 0:
+                self._matrices[key] = built
+                self._matrices.move_to_end(key)
+                self._evict()
+        return built
+
+    def invalidate(self, *, space_id: str, embed_model: str) -> None:
+        with self._lock:
+            self._matrices.pop((str(space_id), embed_model), None)
+
+    def top_k(
+        self,
+        *,
+        space_id: str,
+        embed_model: str,
+        query: np.ndarray,
+        k: int,
+        page_ids: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[float, str, int]]:
+        """
+        Best k chunks of the space for a normalized query vector, optionally restricted
+        to page_ids: [(score, page_id, chunk_index), ...], best first.
+        """
+        m = self.matrix(space_id=space_id, embed_model=embed_model)
+        if m.vectors.shape[0] == 0 or m.vectors.shape[1] != query.shape[0]:
+            return []
+        mask = np.isin(m.page_ids, np.array([str(p) for p in page_ids], dtype=str)) if page_ids is not None else None
+        idx, scores = top_k_rows(m.vectors, query, k, mask)
+        return [(float(s), str(m.page_ids[i]), int(m.chunk_index[i])) for i, s in zip(idx, scores)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "spaces": len(self._matrices),
+                "rows": sum(int(m.vectors.shape[0]) for m in self._matrices.values()),
+                "bytes": sum(m.nbytes for m in self._matrices.values()),
+                "max_spaces": self._max_spaces,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "uncached": self.uncached,
+            }
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """
+    Process-wide index from env: VECTOR_INDEX_MAX_SPACES (8, 0 = no caching) and
+    VECTOR_INDEX_MAX_BYTES (536870912, 0 = no byte limit).
+    """
+    global _index
+    if _index is not None:
+        return _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex(
+                max_spaces=int(os.getenv("VECTOR_INDEX_MAX_SPACES", "8") or "0"),
+                max_bytes=int(os.getenv("VECTOR_INDEX_MAX_BYTES", str(512 * 1024 * 1024)) or "0"),
+            )
+    return _index
@@ -1,12 +1,13 @@
 import json
 import os
-import time
 from typing import Any, Dict, List
 from uuid import UUID
 
 from flask import Flask, Response, jsonify, request
 
 from backend.db import repo
+from backend.db.events import get_listener
+from backend.db.session import pool_stats
 
 
 def _statuses_from_env() -> List[str]:
@@ -21,7 +22,14 @@ def _sse(event: str, data: Dict[str, Any]) -> str:
 def register_routes(app: Flask) -> None:
     job_create_path = os.getenv("JOB_CREATE_PATH", "/api/jobs")
     sse_path = os.getenv("SSE_PATH", "/api/sse")
-    poll_ms = int(os.getenv("WORKER_POLL_INTERVAL_MS", "500"))
+    metrics_path = os.getenv("METRICS_PATH", "/api/metrics")
+    # Idle streams wait on job NOTIFY events; this only bounds how long a stream goes
+    # without sending anything (a comment line keeps proxies from closing it).
+    keepalive_s = max(1.0, float(os.getenv("SSE_KEEPALIVE_S", "15")))
+    token_streaming = (os.getenv("ENABLE_TOKEN_STREAMING") or "").strip().lower() in ("1", "true", "yes", "on")
+    channels = [repo.JOB_EVENTS_CHANNEL]
+    if token_streaming:
+        channels.append(repo.JOB_TOKENS_CHANNEL)
 
     statuses = _statuses_from_env()
     queued = "queued"
@@ -93,43 +101,75 @@ def register_routes(app: Flask) -> None:
 
         def gen():
             last_status = None
-            sent_final = False
 
-            while True:
+            # Subscribe before the first read so no transition can slip in between.
+            with get_listener().subscribe(*channels, key=str(job_id)) as sub:
                 j = repo.get_job(job_id=job_id)
-                if not j:
-                    yield _sse("error", {
-                        "job_id": job_id_raw,
-                        "error": "job_id row not_found in db",
-                        "message": "Double check the job_id value to receive sse event"
-                    })
-                    return
-
-                if j.status != last_status:
-                    last_status = j.status
-                    yield _sse("job_status", {
-                        "job_id": job_id_raw,
-                        "status": j.status
-                    })
-
-                if not sent_final and j.status == done and (j.final_text is not None):
-                    sent_final = True
-                    yield _sse("final", {
-                        "job_id": job_id_raw,
-                        "final_text": j.final_text
-                    })
-                    return
-
-                if j.status == failed and (j.error_text is not None):
-                    yield _sse("error", {
-                        "job_id": job_id_raw,
-                        "error_text": j.error_text,
-                        "message": "We ran into an issue when attempting to modify or manage a job row"
-                    })
-                    return
-
-                time.sleep(max(0.05, poll_ms / 1000.0))
+                while True:
+                    if not j:
+                        yield _sse("error", {
+                            "job_id": job_id_raw,
+                            "error": "job_id row not_found in db",
+                            "message": "Double check the job_id value to receive sse event"
+                        })
+                        return
+
+                    if j.status != last_status:
+                        last_status = j.status
+                        yield _sse("job_status", {
+                            "job_id": job_id_raw,
+                            "status": j.status
+                        })
+
+                    if j.status == done and (j.final_text is not None):
+                        yield _sse("final", {
+                            "job_id": job_id_raw,
+                            "final_text": j.final_text
+                        })
+                        return
+
+                    if j.status == failed and (j.error_text is not None):
+                        yield _sse("error", {
+                            "job_id": job_id_raw,
+                            "error_text": j.error_text,
+                            "message": "We ran into an issue when attempting to modify or manage a job row"
+                        })
+                        return
+
+                    # Block until this job changes; no queries while idle.
+                    while True:
+                        event = sub.wait(timeout=keepalive_s)
+                        if event is None:
+                            yield ": keepalive\n\n"
+                            continue
+
+                        if event.get("channel") == repo.JOB_TOKENS_CHANNEL:
+                            # Partial output; the complete text still arrives as "final".
+                            yield _sse("token", {
+                                "job_id": job_id_raw,
+                                "seq": event.get("seq"),
+                                "text": event.get("text") or ""
+                            })
+                            continue
+
+                        status = event.get("status")
+                        if status and status not in (done, failed) and not event.get("resync"):
+                            # Intermediate status: the payload carries everything we emit.
+                            if status != last_status:
+                                last_status = status
+                                yield _sse("job_status", {
+                                    "job_id": job_id_raw,
+                                    "status": status
+                                })
+                            continue
+                        break
+
+                    j = repo.get_job(job_id=job_id)
 
         return Response(gen(), mimetype="text/event-stream")
 
+    @app.get(metrics_path)
+    def metrics():
+        return jsonify({"ok": True, "db_pool": pool_stats(), "jobs": repo.count_jobs_by_status()})
+
 
@@ -10,8 +10,63 @@ CREATE TABLE IF NOT EXISTS public.dah_jobs (
     final_text TEXT NULL,
     error_text TEXT NULL,
 
-    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+    prompt_stats JSONB NULL,
+
+    fingerprint TEXT NULL
 );
 
 CREATE INDEX IF NOT EXISTS dah_jobs_status_created_idx
   ON public.dah_jobs (status, created_at);
+
+CREATE INDEX IF NOT EXISTS dah_jobs_fingerprint_created_idx
+  ON public.dah_jobs (fingerprint, created_at)
+  WHERE fingerprint IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS public.dah_page_chunks (
+    page_id UUID NOT NULL,
+    embed_model TEXT NOT NULL,
+    chunk_index INT NOT NULL,
+    space_id UUID NULL,
+    page_version TEXT NOT NULL,
+    chunk_text TEXT NOT NULL,
+    dims INT NOT NULL,
+    embedding BYTEA NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (page_id, embed_model, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS dah_page_chunks_space_model_idx
+  ON public.dah_page_chunks (space_id, embed_model);
+
+CREATE TABLE IF NOT EXISTS public.dah_page_chunk_versions (
+    space_id UUID NOT NULL,
+    embed_model TEXT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 1,
+    PRIMARY KEY (space_id, embed_model)
+);
+
+CREATE TABLE IF NOT EXISTS public.dah_page_mirror (
+    page_id UUID PRIMARY KEY,
+    space_id UUID NULL,
+    title TEXT NULL,
+    parent_page_id UUID NULL,
+    creator_id UUID NULL,
+    created_at TIMESTAMPTZ NULL,
+    updated_at TIMESTAMPTZ NULL,
+    deleted_at TIMESTAMPTZ NULL,
+    version TEXT NULL,
+    text_content TEXT NULL,
+    synced_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS dah_page_mirror_space_idx
+  ON public.dah_page_mirror (space_id);
+
+CREATE TABLE IF NOT EXISTS public.dah_sync_state (
+    name TEXT PRIMARY KEY,
+    watermark_changed_at TIMESTAMPTZ NULL,
+    watermark_id UUID NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
@@ -1,6 +1,12 @@
 import os
-from typing import Dict, Any
-import requests
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.integrations.http_session import get_session, timeouts
+
+
+def _session():
+    # Every fetcher call is a read, so POSTs are as safe to retry as GETs.
+    return get_session("docmost-fetcher", retry_methods=("GET", "HEAD", "POST"))
 
 
 def fetch_page_content(*, space_id: str, page_id: str) -> Dict[str, Any]:
@@ -11,6 +17,92 @@ def fetch_page_content(*, space_id: str, page_id: str) -> Dict[str, Any]:
     url = f"{base}/get-content"
     # REMOVED SPACE_ID FOR SINGLE PAGE CONTENT FETCH
     #  params={"space_id": space_id, "page_id": page_id}
-    r = requests.get(url, params={"page_id": page_id}, timeout=20)
+    r = _session().get(
+        url,
+        params={"page_id": page_id},
+        timeout=timeouts(read_env="DOCMOST_FETCHER_READ_TIMEOUT_S", read_default=20.0),
+    )
     r.raise_for_status()
     return r.json()
+
+
+def fetch_page_contents(*, page_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Batch variant of fetch_page_content: one POST /get-content-batch for all ids.
+    Returns {page_id: {"ok": True, "page": {...}}} (the shape build_messages expects);
+    ids the fetcher could not find are absent from the result.
+    """
+    base = (os.getenv("DOCMOST_FETCHER_INTERNAL_BASE_URL") or "").rstrip("/")
+    if not base:
+        raise RuntimeError("DOCMOST_FETCHER_INTERNAL_BASE_URL is required")
+    if not page_ids:
+        return {}
+
+    url = f"{base}/get-content-batch"
+    r = _session().post(
+        url,
+        json={"page_ids": [str(x) for x in page_ids]},
+        timeout=timeouts(read_env="DOCMOST_FETCHER_BATCH_READ_TIMEOUT_S", read_default=60.0),
+    )
+    r.raise_for_status()
+    data = r.json()
+    if not data.get("ok"):
+        raise RuntimeError(f"Batch page fetch failed: {data.get('error') or data.get('message')}")
+
+    return {
+        pid: {"ok": True, "page": {"id": pid, **page}}
+        for pid, page in (data.get("pages") or {}).items()
+    }
+
+
+def fetch_page_versions(*, page_ids: List[str]) -> Dict[str, str]:
+    """
+    POST /get-page-versions: {page_id: version} for pages that still exist, where version
+    is the page's full-precision updated_at. Used to revalidate cached page bodies.
+    """
+    base = (os.getenv("DOCMOST_FETCHER_INTERNAL_BASE_URL") or "").rstrip("/")
+    if not base:
+        raise RuntimeError("DOCMOST_FETCHER_INTERNAL_BASE_URL is required")
+    if not page_ids:
+        return {}
+
+    url = f"{base}/get-page-versions"
+    r = _session().post(
+        url,
+        json={"page_ids": [str(x) for x in page_ids]},
+        timeout=timeouts(read_env="DOCMOST_FETCHER_READ_TIMEOUT_S", read_default=20.0),
+    )
+    r.raise_for_status()
+    data = r.json()
+    if not data.get("ok"):
+        raise RuntimeError(f"Page version check failed: {data.get('error') or data.get('message')}")
+    return dict(data.get("versions") or {})
+
+
+def fetch_page_changes(
+    *, after_changed_at: Optional[str], after_id: Optional[str], limit: int
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    GET /page-changes: pages changed after (after_changed_at, after_id), oldest first,
+    soft-deleted pages included. Returns (pages, has_more).
+    """
+    base = (os.getenv("DOCMOST_FETCHER_INTERNAL_BASE_URL") or "").rstrip("/")
+    if not base:
+        raise RuntimeError("DOCMOST_FETCHER_INTERNAL_BASE_URL is required")
+
+    params: Dict[str, Any] = {"limit": limit}
+    if after_changed_at:
+        params["after_changed_at"] = after_changed_at
+        if after_id:
+            params["after_id"] = after_id
+
+    r = _session().get(
+        f"{base}/page-changes",
+        params=params,
+        timeout=timeouts(read_env="DOCMOST_FETCHER_BATCH_READ_TIMEOUT_S", read_default=60.0),
+    )
+    r.raise_for_status()
+    data = r.json()
+    if not data.get("ok"):
+        raise RuntimeError(f"Page change feed failed: {data.get('error') or data.get('message')}")
+    return list(data.get("pages") or []), bool(data.get("has_more"))
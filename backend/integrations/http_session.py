@@ -0,0 +1,67 @@
+import os
+import threading
+from typing import Dict, Iterable, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = (os.getenv(name) or "").strip()
+    return int(raw) if raw else default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = (os.getenv(name) or "").strip()
+    return float(raw) if raw else default
+
+
+def timeouts(*, read_env: str, read_default: float) -> Tuple[float, float]:
+    """
+    (connect, read) tuple for requests: HTTP_CONNECT_TIMEOUT_S is shared,
+    the read timeout comes from the caller's own env var.
+    """
+    return _env_float("HTTP_CONNECT_TIMEOUT_S", 5.0), _env_float(read_env, read_default)
+
+
+def _build(*, retry_methods: Iterable[str]) -> requests.Session:
+    retries = Retry(
+        total=_env_int("HTTP_RETRY_TOTAL", 3),
+        backoff_factor=_env_float("HTTP_RETRY_BACKOFF_S", 0.3),
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(m.upper() for m in retry_methods),
+        raise_on_status=False,
+    )
+    pool_size = _env_int("HTTP_POOL_MAXSIZE", 32)
+    adapter = HTTPAdapter(
+        pool_connections=_env_int("HTTP_POOL_CONNECTIONS", 4),
+        pool_maxsize=pool_size,
+        pool_block=False,
+        max_retries=retries,
+    )
+    s = requests.Session()
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+def get_session(name: str, *, retry_methods: Iterable[str] = ("GET", "HEAD", "OPTIONS")) -> requests.Session:
+    """
+    Process-wide keep-alive session per upstream (e.g. "docmost-fetcher", "ollama").
+    Only retry_methods are retried (with backoff); pass just the calls that are safe
+    to repeat. retry_methods is fixed by the first caller for a given name.
+    """
+    s = _sessions.get(name)
+    if s is not None:
+        return s
+    with _sessions_lock:
+        s = _sessions.get(name)
+        if s is None:
+            s = _build(retry_methods=retry_methods)
+            _sessions[name] = s
+    return s
@@ -1,19 +1,82 @@
 import json
 import os
-from typing import Any, Dict, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-import requests
+from backend.integrations.http_session import get_session, timeouts
 
 
-def chat(*, messages: List[Dict[str, Any]]) -> str:
+def _session():
+    # Chat calls are not idempotent enough to replay; only connection errors are retried.
+    return get_session("ollama", retry_methods=())
+
+
+_llm_slots: Optional[threading.BoundedSemaphore] = None
+_llm_slots_lock = threading.Lock()
+_llm_in_flight = 0
+_llm_waiting = 0
+
+
+def _max_concurrency() -> int:
+    """
+    OLLAMA_MAX_CONCURRENCY caps concurrent chat calls per process, independently of
+    WORKER_CONCURRENCY (which also bounds page fetching). Unset/0 means no extra cap.
+    """
+    return int((os.getenv("OLLAMA_MAX_CONCURRENCY") or "0").strip() or "0")
+
+
+@contextmanager
+def _llm_slot() -> Iterator[None]:
+    global _llm_slots, _llm_in_flight, _llm_waiting
+    limit = _max_concurrency()
+    if limit > 0 and _llm_slots is None:
+        with _llm_slots_lock:
+            if _llm_slots is None:
+                _llm_slots = threading.BoundedSemaphore(limit)
+
+    with _llm_slots_lock:
+        _llm_waiting += 1
+    if limit > 0:
+        _llm_slots.acquire()
+    with _llm_slots_lock:
+        _llm_waiting -= 1
+        _llm_in_flight += 1
+    try:
+        yield
+    finally:
+        with _llm_slots_lock:
+            _llm_in_flight -= 1
+        if limit > 0:
+            _llm_slots.release()
+
+
+def llm_stats() -> Dict[str, int]:
+    with _llm_slots_lock:
+        return {
+            "max_concurrency": _max_concurrency(),
+            "in_flight": _llm_in_flight,
+            "waiting": _llm_waiting,
+        }
+
+
+def chat_model() -> str:
+    return (os.getenv("OLLAMA_MODEL") or "").strip()
+
+
+def chat_options_json() -> str:
+    return (os.getenv("OLLAMA_OPTIONS_JSON") or "").strip()
+
+
+def _chat_request(*, messages: List[Dict[str, Any]], stream: bool) -> Tuple[str, Dict[str, Any]]:
     base = (os.getenv("OLLAMA_BASE_URL") or "").rstrip("/")
-    model = (os.getenv("OLLAMA_MODEL") or "").strip()
+    model = chat_model()
     if not base:
         raise RuntimeError("OLLAMA_BASE_URL is required")
     if not model:
         raise RuntimeError("OLLAMA_MODEL is required")
 
-    options_json = (os.getenv("OLLAMA_OPTIONS_JSON") or "").strip()
+    options_json = chat_options_json()
     options: Optional[Dict[str, Any]] = None
     if options_json:
         options = json.loads(options_json)
@@ -21,12 +84,19 @@ def chat(*, messages: List[Dict[str, Any]]) -> str:
     payload: Dict[str, Any] = {
         "model": model,
         "messages": messages,
-        "stream": False,
+        "stream": stream,
     }
     if options is not None:
         payload["options"] = options
 
-    r = requests.post(f"{base}/api/chat", json=payload, timeout=180)
+    return f"{base}/api/chat", payload
+
+
+def chat(*, messages: List[Dict[str, Any]]) -> str:
+    url, payload = _chat_request(messages=messages, stream=False)
+
+    with _llm_slot():
+        r = _session().post(url, json=payload, timeout=timeouts(read_env="OLLAMA_READ_TIMEOUT_S", read_default=180.0))
     r.raise_for_status()
     data = r.json()
 
@@ -36,3 +106,76 @@ def chat(*, messages: List[Dict[str, Any]]) -> str:
     if not isinstance(content, str):
         raise RuntimeError(f"Unexpected Ollama response shape: {data}")
     return content
+
+
+def embed_model() -> str:
+    """
+    OLLAMA_EMBED_MODEL (default "nomic-embed-text"); stored with every embedding so
+    vectors from different models are never compared.
+    """
+    return (os.getenv("OLLAMA_EMBED_MODEL") or "nomic-embed-text").strip()
+
+
+def embed(*, texts: List[str]) -> List[List[float]]:
+    """
+    Embeds texts with Ollama's /api/embed, OLLAMA_EMBED_BATCH_SIZE inputs per request.
+    Returns one vector per text, in input order.
+    """
+    base = (os.getenv("OLLAMA_BASE_URL") or "").rstrip("/")
+    if not base:
+        raise RuntimeError("OLLAMA_BASE_URL is required")
+    batch_size = max(1, int(os.getenv("OLLAMA_EMBED_BATCH_SIZE", "32") or "32"))
+
+    out: List[List[float]] = []
+    for i in range(0, len(texts), batch_size):
+        batch = texts[i:i + batch_size]
+        with _llm_slot():
+            r = _session().post(
+                f"{base}/api/embed",
+                json={"model": embed_model(), "input": batch},
+                timeout=timeouts(read_env="OLLAMA_EMBED_READ_TIMEOUT_S", read_default=120.0),
+            )
+        r.raise_for_status()
+        data = r.json()
+
+        # Ollama returns { embeddings: [[...], ...], ... }
+        vectors = data.get("embeddings")
+        if not isinstance(vectors, list) or len(vectors) != len(batch):
+            raise RuntimeError(f"Unexpected Ollama embed response shape: {str(data)[:200]}")
+        out.extend(vectors)
+    return out
+
+
+def chat_stream(*, messages: List[Dict[str, Any]], on_token: Callable[[str], None]) -> str:
+    """
+    Streaming variant of chat(): consumes Ollama's NDJSON chunks as they arrive,
+    calls on_token for every non-empty content delta and returns the full text.
+    The read timeout applies per chunk, not to the whole completion.
+    """
+    url, payload = _chat_request(messages=messages, stream=True)
+
+    parts: List[str] = []
+    with _llm_slot():
+        with _session().post(
+            url,
+            json=payload,
+            stream=True,
+            timeout=timeouts(read_env="OLLAMA_READ_TIMEOUT_S", read_default=180.0),
+        ) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Ollama stream error: {data['error']}")
+
+                # Each chunk is { message: { role, content }, done: bool, ... }
+                content = (data.get("message") or {}).get("content")
+                if content:
+                    parts.append(content)
+                    on_token(content)
+                if data.get("done"):
+                    break
+
+    return "".join(parts)
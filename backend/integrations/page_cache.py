@@ -0,0 +1,141 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.integrations.docmost_client import fetch_page_versions
+
+
+def _page_version(blob: Dict[str, Any]) -> Optional[str]:
+    return (blob.get("page") or {}).get("version")
+
+
+def _blob_size(blob: Dict[str, Any]) -> int:
+    page = blob.get("page") or {}
+    return sum(len(v.encode("utf-8")) for v in page.values() if isinstance(v, str))
+
+
+class PageContentCache:
+    """
+    Bounded LRU of page blobs ({"ok": True, "page": {...}}) keyed by page id and
+    tagged with the page version (updated_at). Entries are never served blind:
+    get_many() revalidates them with one cheap version lookup, and only pages whose
+    version changed (or that are not cached) are fetched again.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int = 0) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    # ---------- internals (caller holds the lock) ----------
+
+    def _drop(self, page_id: str) -> None:
+        self._entries.pop(page_id, None)
+        self._bytes -= self._sizes.pop(page_id, 0)
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self._max_entries
+            or (self._max_bytes > 0 and self._bytes > self._max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    # ---------- public ----------
+
+    def put(self, page_id: str, blob: Dict[str, Any]) -> None:
+        if _page_version(blob) is None:
+            # Nothing to revalidate against; caching it would mean serving it blind.
+            return
+        size = _blob_size(blob)
+        if self._max_bytes > 0 and size > self._max_bytes:
+            return
+        with self._lock:
+            self._drop(page_id)
+            self._entries[page_id] = blob
+            self._sizes[page_id] = size
+            self._bytes += size
+            self._evict()
+
+    def get_many(
+        self,
+        page_ids: List[str],
+        fetch: Callable[[List[str]], Dict[str, Dict[str, Any]]],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns {page_id: blob} like the fetch callable does; pages missing upstream are absent.
+        """
+        with self._lock:
+            cached = {pid: self._entries[pid] for pid in page_ids if pid in self._entries}
+
+        fresh: Dict[str, Dict[str, Any]] = {}
+        if cached:
+            versions = fetch_page_versions(page_ids=list(cached))
+            with self._lock:
+                for pid, blob in cached.items():
+                    current = versions.get(pid)
+                    if current is not None and current == _page_version(blob):
+                        fresh[pid] = blob
+                        if pid in self._entries:
+                            self._entries.move_to_end(pid)
+                    else:
+                        # Changed or deleted upstream.
+                        self._drop(pid)
+                        self.stale += 1
+                self.hits += len(fresh)
+
+        to_fetch = [pid for pid in page_ids if pid not in fresh]
+        fetched = fetch(to_fetch) if to_fetch else {}
+        with self._lock:
+            self.misses += len(to_fetch)
+        for pid, blob in fetched.items():
+            self.put(pid, blob)
+
+        return {**fetched, **fresh}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+            }
+
+
+_cache: Optional[PageContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageContentCache]:
+    """
+    Process-wide cache from env: PAGE_CACHE_MAX_ENTRIES (default 512, 0 disables)
+    and PAGE_CACHE_MAX_BYTES (default 0 = no byte limit).
+    """
+    global _cache
+    max_entries = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "512") or "0")
+    if max_entries <= 0:
+        return None
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageContentCache(
+                max_entries=max_entries,
+                max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", "0") or "0"),
+            )
+    return _cache
@@ -1,23 +1,150 @@
-from typing import Any, Dict, List
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Tuple
 
 
-def build_messages(*, user_message: str, page_blobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+PAGE_SEPARATOR = "\n\n---\n\n"
+
+
+@dataclass(frozen=True)
+class PromptStats:
+    """
+    What build_prompt kept and dropped; stored on the job row (dah_jobs.prompt_stats).
+    Token counts are estimates (see estimate_tokens).
+    """
+    budget_tokens: int
+    pages_total: int
+    pages_included: int
+    pages_truncated: int
+    pages_dropped: int
+    tokens_in: int
+    tokens_kept: int
+    tokens_dropped: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _chars_per_token() -> float:
+    return max(1.0, float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4") or "4"))
+
+
+def context_budget_tokens() -> int:
+    return max(0, int(os.getenv("PROMPT_CONTEXT_BUDGET_TOKENS", "6000") or "6000"))
+
+
+def _max_page_tokens() -> int:
+    """
+    Per-page cap on top of the shared budget; 0 means only the shared budget applies.
+    """
+    return max(0, int(os.getenv("PROMPT_MAX_PAGE_TOKENS", "0") or "0"))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap, deterministic estimate (characters / PROMPT_CHARS_PER_TOKEN), no tokenizer needed.
+    """
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / _chars_per_token()))
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """
+    Keeps the head of the page, preferring to cut at a paragraph/line/word boundary in the
+    last 10% of the allowance, and appends a marker saying how much was cut.
     """
-    Returns Ollama-style messages[].
+    max_chars = int(max_tokens * _chars_per_token())
+    if len(text) <= max_chars:
+        return text
+
+    head = text[:max_chars]
+    floor = int(max_chars * 0.9)
+    for sep in ("\n\n", "\n", " "):
+        cut = head.rfind(sep, floor)
+        if cut > 0:
+            head = head[:cut]
+            break
+    return f"{head.rstrip()}\n[... truncated, kept {len(head)} of {len(text)} characters]"
+
+
+def _allocate(sizes: List[int], budget: int, per_page_cap: int) -> List[int]:
+    """
+    Water-filling split of the budget: small pages are kept whole, the remainder is shared
+    evenly among the larger ones. Deterministic for a given input order.
+    """
+    alloc = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: (sizes[i], i))
+    for k, i in enumerate(order):
+        share = remaining // (len(sizes) - k)
+        want = sizes[i] if per_page_cap <= 0 else min(sizes[i], per_page_cap)
+        alloc[i] = min(want, share)
+        remaining -= alloc[i]
+    return alloc
+
+
+def build_prompt(*, user_message: str, page_blobs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], PromptStats]:
+    """
+    Returns Ollama-style messages[] plus PromptStats.
     page_blobs are the *fetched* objects from docmost-fetcher, already filtered by caller.
+    All pages go into a single system message, fitted to PROMPT_CONTEXT_BUDGET_TOKENS.
     """
-    messages: List[Dict[str, Any]] = []
+    budget = context_budget_tokens()
+    per_page_cap = _max_page_tokens()
 
-    # System: context
+    sections: List[Tuple[str, str]] = []
     for blob in page_blobs:
         # blob is expected to contain {"ok": True, "page": {...}}
         page = (blob.get("page") or {})
         title = page.get("title") or "(untitled)"
         text = page.get("text_content") or ""
+        sections.append((f"{title}:\n", text))
+
+    # Titles are always paid for first; only page bodies are fitted to what is left.
+    header_tokens = [estimate_tokens(h) for h, _ in sections]
+    body_tokens = [estimate_tokens(t) for _, t in sections]
+    tokens_in = sum(header_tokens) + sum(body_tokens)
+
+    alloc = _allocate(body_tokens, max(0, budget - sum(header_tokens)), per_page_cap)
+
+    parts: List[str] = []
+    truncated = dropped = kept = 0
+    for (header, text), h_tokens, b_tokens, a in zip(sections, header_tokens, body_tokens, alloc):
+        if b_tokens and a == 0:
+            dropped += 1
+            continue
+        if a < b_tokens:
+            truncated += 1
+            text = _truncate(text, a)
+        parts.append(header + text)
+        kept += h_tokens + min(a, b_tokens)
+
+    messages: List[Dict[str, Any]] = []
+    if parts:
         messages.append({
             "role": "system",
-            "content": f"{title}:\n{text}",
+            "content": PAGE_SEPARATOR.join(parts),
         })
-
     messages.append({"role": "user", "content": user_message})
+
+    stats = PromptStats(
+        budget_tokens=budget,
+        pages_total=len(sections),
+        pages_included=len(parts),
+        pages_truncated=truncated,
+        pages_dropped=dropped,
+        tokens_in=tokens_in,
+        tokens_kept=kept,
+        tokens_dropped=tokens_in - kept,
+    )
+    return messages, stats
+
+
+def build_messages(*, user_message: str, page_blobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Returns Ollama-style messages[] (see build_prompt for budgeting).
+    """
+    messages, _ = build_prompt(user_message=user_message, page_blobs=page_blobs)
     return messages
@@ -0,0 +1,254 @@
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.db import repo
+from backend.db.vector_index import VECTOR_DTYPE, from_vector_bytes, to_vector_bytes, top_k_rows
+from backend.integrations.ollama_client import embed, embed_model
+from backend.prompt.prompt_builder import context_budget_tokens, estimate_tokens
+
+
+# Placed between non-adjacent chunks of the same page so the model sees the gap.
+CHUNK_GAP = "\n[...]\n"
+
+
+@dataclass(frozen=True)
+class RetrievalStats:
+    """
+    What the retrieval stage did for one job; stored under prompt_stats["retrieval"].
+    """
+    applied: bool
+    skipped_reason: Optional[str]
+    pages_total: int
+    pages_kept: int
+    chunks_total: int
+    chunks_embedded: int
+    chunks_selected: int
+    tokens_in: int
+    tokens_selected: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def retrieval_enabled() -> bool:
+    """
+    RAG_ENABLED (off by default): needs OLLAMA_EMBED_MODEL pulled in Ollama, otherwise
+    every over-budget job pays for a failed embed call before falling back to full pages.
+    """
+    return (os.getenv("RAG_ENABLED", "0") or "0").strip().lower() not in ("0", "false", "no")
+
+
+def _top_k() -> int:
+    return max(1, int(os.getenv("RAG_TOP_K", "8") or "8"))
+
+
+def _chunk_chars() -> int:
+    return max(200, int(os.getenv("RAG_CHUNK_CHARS", "1200") or "1200"))
+
+
+def _chunk_overlap_chars() -> int:
+    return max(0, int(os.getenv("RAG_CHUNK_OVERLAP_CHARS", "150") or "150"))
+
+
+def _min_context_tokens() -> int:
+    """
+    Retrieval only runs when the selected pages exceed this many (estimated) tokens;
+    smaller selections go to the prompt whole. 0 = PROMPT_CONTEXT_BUDGET_TOKENS.
+    """
+    raw = int(os.getenv("RAG_MIN_CONTEXT_TOKENS", "0") or "0")
+    return raw if raw > 0 else context_budget_tokens()
+
+
+def chunk_text(text: str, *, max_chars: int, overlap_chars: int) -> List[str]:
+    """
+    Splits text into chunks of at most max_chars, cutting at a paragraph/line/sentence/word
+    boundary in the back half of each window; consecutive chunks overlap by ~overlap_chars.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + max_chars)
+        if end < len(text):
+            floor = start + max_chars // 2
+            for sep in ("\n\n", "\n", ". ", " "):
+                cut = text.rfind(sep, floor, end)
+                if cut > 0:
+                    end = cut + len(sep)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap_chars, start + 1)
+    return chunks
+
+
+def _without_overlap(prev: str, nxt: str) -> str:
+    """
+    nxt minus the text it repeats from the end of prev (chunk_text overlaps neighbours).
+    """
+    for k in range(min(len(prev), len(nxt), 2 * _chunk_overlap_chars()), 0, -1):
+        if prev.endswith(nxt[:k]):
+            return nxt[k:]
+    return "\n" + nxt
+
+
+def _page_version(page: Dict[str, Any]) -> Optional[str]:
+    version = page.get("version") or page.get("updated_at")
+    return str(version) if version else None
+
+
+def _load_or_embed(
+    *, space_id: Optional[str], pages: List[Tuple[str, Dict[str, Any]]]
+) -> Tuple[Dict[str, List[Tuple[str, bytes]]], int]:
+    """
+    Chunks with embeddings for every page: reused from dah_page_chunks when stored for the
+    same page version, otherwise chunked, embedded in one batch and stored.
+    Returns ({page_id: [(chunk_text, blob), ...]}, number of chunks embedded now).
+    """
+    model = embed_model()
+    stored: Dict[str, List[repo.PageChunkRow]] = {}
+    for row in repo.get_page_chunks(page_ids=[pid for pid, _ in pages], embed_model=model):
+        stored.setdefault(row.page_id, []).append(row)
+
+    out: Dict[str, List[Tuple[str, bytes]]] = {}
+    pending: List[Tuple[str, Dict[str, Any], List[str]]] = []
+    for pid, page in pages:
+        rows = stored.get(pid)
+        version = _page_version(page)
+        if rows and version is not None and all(r.page_version == version for r in rows):
+            out[pid] = [(r.chunk_text, r.embedding) for r in rows]
+            continue
+        chunks = chunk_text(
+            page.get("text_content") or "",
+            max_chars=_chunk_chars(),
+            overlap_chars=_chunk_overlap_chars(),
+        )
+        pending.append((pid, page, chunks))
+
+    texts = [c for _, _, chunks in pending for c in chunks]
+    vectors = embed(texts=texts) if texts else []
+
+    i = 0
+    for pid, page, chunks in pending:
+        page_vectors = vectors[i:i + len(chunks)]
+        i += len(chunks)
+        out[pid] = [(c, to_vector_bytes(v)) for c, v in zip(chunks, page_vectors)]
+
+        version = _page_version(page)
+        if version is None or space_id is None:
+            # Nothing to key the stored copy on; use it for this job only.
+            continue
+        repo.upsert_page_chunks(
+            page_id=pid,
+            space_id=space_id,
+            page_version=version,
+            embed_model=model,
+            dims=len(page_vectors[0]) if page_vectors else 0,
+            chunks=out[pid],
+        )
+
+    return out, len(texts)
+
+
+def _rank_local(
+    chunks_by_page: Dict[str, List[Tuple[str, bytes]]], query: np.ndarray, k: int
+) -> List[Tuple[float, str, int]]:
+    """
+    Same ranking as the space index, over just this job's chunks, which are already in
+    memory; no space-wide matrix is loaded. [(score, page_id, chunk_index), ...], best first.
+    """
+    refs = [(pid, idx) for pid, chunks in chunks_by_page.items() for idx in range(len(chunks))]
+    blobs = [chunks_by_page[pid][idx][1] for pid, idx in refs]
+    if not blobs:
+        return []
+    vectors = np.frombuffer(b"".join(blobs), dtype=VECTOR_DTYPE)
+    if vectors.shape[0] != len(blobs) * query.shape[0]:
+        return []
+    idx, scores = top_k_rows(vectors.reshape(len(blobs), query.shape[0]), query, k)
+    return [(float(s), refs[i][0], refs[i][1]) for i, s in zip(idx, scores)]
+
+
+def retrieve(
+    *, query: str, space_id: Optional[str], page_blobs: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], RetrievalStats]:
+    """
+    Replaces each page's text_content with its chunks among the RAG_TOP_K most similar to
+    query (cosine over Ollama embeddings), in page order. Pages without a selected chunk
+    are left out. Small selections (see RAG_MIN_CONTEXT_TOKENS) are returned unchanged.
+    """
+    pages: List[Tuple[str, Dict[str, Any]]] = []
+    for blob in page_blobs:
+        page = blob.get("page") or {}
+        pages.append((str(page.get("id") or ""), page))
+
+    tokens_in = sum(estimate_tokens(page.get("text_content") or "") for _, page in pages)
+
+    def _skipped(reason: str) -> Tuple[List[Dict[str, Any]], RetrievalStats]:
+        return page_blobs, RetrievalStats(
+            applied=False, skipped_reason=reason, pages_total=len(pages), pages_kept=len(pages),
+            chunks_total=0, chunks_embedded=0, chunks_selected=0,
+            tokens_in=tokens_in, tokens_selected=tokens_in,
+        )
+
+    if not pages:
+        return _skipped("no_pages")
+    if tokens_in <= _min_context_tokens():
+        return _skipped("below_min_context_tokens")
+    if not all(pid for pid, _ in pages):
+        return _skipped("page_without_id")
+
+    chunks_by_page, embedded = _load_or_embed(space_id=space_id, pages=pages)
+    query_vec = embed(texts=[query])[0]
+
+    # Every chunk of the job is in hand, so rank them here; the space index is for
+    # queries over a whole space (repo.top_k_page_chunks without page_ids).
+    best = _rank_local(chunks_by_page, from_vector_bytes(to_vector_bytes(query_vec)), _top_k())
+
+    picked: Dict[str, List[int]] = {}
+    for _, pid, idx in best:
+        # Another worker may have re-chunked a page since we loaded it.
+        if pid in chunks_by_page and idx < len(chunks_by_page[pid]):
+            picked.setdefault(pid, []).append(idx)
+
+    out: List[Dict[str, Any]] = []
+    tokens_selected = 0
+    for blob, (pid, page) in zip(page_blobs, pages):
+        idxs = sorted(picked.get(pid) or [])
+        if not idxs:
+            continue
+        chunks = chunks_by_page[pid]
+        parts: List[str] = []
+        for n, idx in enumerate(idxs):
+            if n and idx != idxs[n - 1] + 1:
+                parts.append(CHUNK_GAP)
+                parts.append(chunks[idx][0])
+            elif n:
+                parts.append(_without_overlap(chunks[idx - 1][0], chunks[idx][0]))
+            else:
+                parts.append(chunks[idx][0])
+        text = "".join(parts)
+        tokens_selected += estimate_tokens(text)
+        out.append({**blob, "page": {**page, "text_content": text}})
+
+    return out, RetrievalStats(
+        applied=True,
+        skipped_reason=None,
+        pages_total=len(pages),
+        pages_kept=len(out),
+        chunks_total=sum(len(c) for c in chunks_by_page.values()),
+        chunks_embedded=embedded,
+        chunks_selected=sum(len(v) for v in picked.values()),
+        tokens_in=tokens_in,
+        tokens_selected=tokens_selected,
+    )
@@ -0,0 +1,99 @@
+import logging
+import os
+import signal
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from backend.db import repo
+from backend.integrations.docmost_client import fetch_page_changes
+
+logger = logging.getLogger(__name__)
+
+
+SYNC_NAME = "docmost_pages"
+
+# Lowest possible id: resuming at (changed_at, NIL_UUID) re-reads every row with that changed_at.
+NIL_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def mirror_sync_interval_s() -> float:
+    return max(1.0, float(os.getenv("MIRROR_SYNC_INTERVAL_S", "30") or "30"))
+
+
+def _batch_size() -> int:
+    return max(1, int(os.getenv("MIRROR_SYNC_BATCH_SIZE", "200") or "200"))
+
+
+def _lookback_s() -> float:
+    """
+    Each pass restarts this far behind the watermark. updated_at is set when a Docmost
+    transaction writes, not when it commits, so a slow transaction can surface with a
+    changed_at we have already passed; re-reading the recent window picks it up.
+    Re-applied rows are cheap: unchanged versions are not rewritten.
+    """
+    return max(0.0, float(os.getenv("MIRROR_SYNC_LOOKBACK_S", "120") or "120"))
+
+
+def _resume_position(watermark: Optional[Tuple[str, Optional[str]]]) -> Tuple[Optional[str], Optional[str]]:
+    if watermark is None:
+        return None, None
+    changed_at, page_id = watermark
+    lookback = _lookback_s()
+    if lookback <= 0:
+        return changed_at, page_id
+    return (datetime.fromisoformat(changed_at) - timedelta(seconds=lookback)).isoformat(), NIL_UUID
+
+
+def sync_once(*, name: str = SYNC_NAME, stop: Optional[threading.Event] = None) -> int:
+    """
+    Pulls the fetcher change feed from the stored watermark until it is drained and applies
+    it to the mirror, one transaction per batch (rows + watermark). Returns rows written.
+    """
+    after_changed_at, after_id = _resume_position(repo.get_sync_watermark(name=name))
+    batch_size = _batch_size()
+
+    written = 0
+    while stop is None or not stop.is_set():
+        pages, has_more = fetch_page_changes(after_changed_at=after_changed_at, after_id=after_id, limit=batch_size)
+        if not pages:
+            break
+
+        last = pages[-1]
+        watermark = (str(last["changed_at"]), str(last["id"]))
+        written += repo.apply_mirror_changes(name=name, pages=pages, watermark=watermark)
+        after_changed_at, after_id = watermark
+
+        if not has_more:
+            break
+    return written
+
+
+def run_forever(stop: Optional[threading.Event] = None) -> None:
+    """
+    Keeps dah_page_mirror current: one sync pass every MIRROR_SYNC_INTERVAL_S.
+    Errors are logged and retried on the next pass; the watermark only moves with
+    committed batches.
+    """
+    stop = stop or threading.Event()
+    try:
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+    except ValueError:
+        # Not the main thread; the caller owns shutdown through `stop`.
+        pass
+
+    repo.ensure_schema()
+    interval_s = mirror_sync_interval_s()
+    logger.info(f"Mirror sync started (interval {interval_s:.0f}s, lookback {_lookback_s():.0f}s)")
+
+    while not stop.is_set():
+        try:
+            written = sync_once(stop=stop)
+            if written:
+                logger.info(f"Mirror sync: {written} page rows written")
+        except Exception:
+            logger.warning("Mirror sync pass failed, retrying next interval", exc_info=True)
+        stop.wait(interval_s)
+
+    logger.info("Mirror sync stopped")
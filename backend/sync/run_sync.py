@@ -0,0 +1,6 @@
+from backend.sync.mirror import run_forever
+from logging_config import setup_logging
+setup_logging(_service="mirror-sync")
+
+if __name__ == "__main__":
+    run_forever()
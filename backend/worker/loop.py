@@ -1,11 +1,23 @@
+import hashlib
+import json
+import logging
 import os
+import signal
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from backend.db import repo
-from backend.integrations.docmost_client import fetch_page_content
-from backend.integrations.ollama_client import chat
-from backend.prompt.prompt_builder import build_messages
+from backend.db.events import Subscription, get_listener
+from backend.integrations.docmost_client import fetch_page_content, fetch_page_contents, fetch_page_versions
+from backend.integrations.page_cache import get_page_cache
+from backend.integrations.ollama_client import chat, chat_model, chat_options_json, chat_stream, llm_stats
+from backend.prompt.prompt_builder import build_prompt
+from backend.prompt.retrieval import retrieval_enabled, retrieve
+
+logger = logging.getLogger(__name__)
 
 
 def _poll_interval_s() -> float:
@@ -13,33 +25,458 @@ def _poll_interval_s() -> float:
     return max(0.05, ms / 1000.0)
 
 
-def run_forever() -> None:
-    # Ensure schema exists (safe if init.sql already handled it)
-    repo.ensure_schema()
+def _worker_concurrency() -> int:
+    return max(1, int(os.getenv("WORKER_CONCURRENCY", "1") or "1"))
 
-    poll_s = _poll_interval_s()
 
-    while True:
-        job = repo.claim_next_job(from_status="queued", to_status="running")
+def _shutdown_grace_s() -> float:
+    return max(0.0, float(os.getenv("WORKER_SHUTDOWN_GRACE_S", "300") or "300"))
+
+
+def _stats_log_interval_s() -> float:
+    return max(1.0, float(os.getenv("WORKER_STATS_LOG_S", "60") or "60"))
+
+
+def _page_fetch_concurrency() -> int:
+    return max(1, int(os.getenv("WORKER_PAGE_FETCH_CONCURRENCY", "8") or "8"))
+
+
+def _page_fetch_mode() -> str:
+    """
+    "batch" (default): POST /get-content-batch, one query per WORKER_PAGE_FETCH_BATCH_SIZE ids.
+    "per_page": one GET /get-content per page.
+    """
+    mode = (os.getenv("WORKER_PAGE_FETCH_MODE") or "batch").strip().lower()
+    if mode not in ("batch", "per_page"):
+        raise RuntimeError(f"WORKER_PAGE_FETCH_MODE must be 'batch' or 'per_page', got {mode!r}")
+    return mode
+
+
+def _page_source() -> str:
+    """
+    "fetcher" (default): page bodies come live from docmost-fetcher.
+    "mirror": read from dah_page_mirror (kept current by backend.sync, so up to
+    MIRROR_SYNC_INTERVAL_S behind); pages not mirrored yet still go to the fetcher.
+    """
+    source = (os.getenv("WORKER_PAGE_SOURCE") or "fetcher").strip().lower()
+    if source not in ("fetcher", "mirror"):
+        raise RuntimeError(f"WORKER_PAGE_SOURCE must be 'fetcher' or 'mirror', got {source!r}")
+    return source
+
+
+def _page_fetch_batch_size() -> int:
+    return max(1, int(os.getenv("WORKER_PAGE_FETCH_BATCH_SIZE", "200") or "200"))
+
+
+def _page_fetch_failure_policy() -> str:
+    """
+    "fail" (default): any page fetch error fails the whole job.
+    "skip": the page is left out of the prompt and a warning is logged.
+    """
+    policy = (os.getenv("WORKER_PAGE_FETCH_FAILURE_POLICY") or "fail").strip().lower()
+    if policy not in ("fail", "skip"):
+        raise RuntimeError(f"WORKER_PAGE_FETCH_FAILURE_POLICY must be 'fail' or 'skip', got {policy!r}")
+    return policy
+
+
+def _token_streaming_enabled() -> bool:
+    return (os.getenv("ENABLE_TOKEN_STREAMING") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _token_flush_interval_s() -> float:
+    return max(0.0, int(os.getenv("TOKEN_STREAM_FLUSH_MS", "100") or "100") / 1000.0)
+
+
+def _job_memo_ttl_s() -> float:
+    """
+    JOB_MEMO_TTL_S (3600): a job identical to a done job created this recently reuses its
+    answer instead of calling Ollama. 0 disables memoization.
+    """
+    return max(0.0, float(os.getenv("JOB_MEMO_TTL_S", "3600") or "0"))
+
+
+def _fallback_poll_s() -> float:
+    """
+    Safety-net poll while waiting on LISTEN: covers NOTIFYs lost across a listener reconnect
+    or jobs inserted by something other than repo.create_job.
+    """
+    ms = int(os.getenv("WORKER_FALLBACK_POLL_MS", "30000"))
+    return max(0.05, ms / 1000.0)
+
+
+def _subscribe_queue() -> Optional[Subscription]:
+    try:
+        return get_listener().subscribe(repo.JOB_QUEUED_CHANNEL)
+    except Exception:
+        logger.warning("Could not LISTEN for queued jobs, falling back to sleep-polling", exc_info=True)
+        return None
+
+
+def _wait_for_work(sub: Optional[Subscription], *, poll_s: float, fallback_s: float) -> None:
+    if sub is None:
+        time.sleep(poll_s)
+        return
+    sub.wait(timeout=fallback_s)
+    # Every queued notification leads to the same thing (claim until empty), so collapse them.
+    sub.drain()
+
+
+class WorkerStats:
+    """
+    In-process counters for this worker; logged periodically and on shutdown.
+    Cross-worker in-flight counts are the "running" jobs reported by /api/metrics.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        self._lock = threading.Lock()
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.claimed = 0
+        self.done = 0
+        self.failed = 0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.claimed += 1
+
+    def finished(self, *, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "in_flight": self.in_flight,
+                "claimed": self.claimed,
+                "done": self.done,
+                "failed": self.failed,
+            }
+
+
+class _TokenPublisher:
+    """
+    Buffers streamed tokens and publishes them via repo.publish_job_tokens at most every
+    TOKEN_STREAM_FLUSH_MS, so a fast model does not turn into one NOTIFY per token.
+    Publishing is best effort: a failure is logged and streaming stops for this job,
+    the final text is still stored by set_job_done.
+    """
+
+    def __init__(self, job_id: UUID) -> None:
+        self._job_id = job_id
+        self._interval_s = _token_flush_interval_s()
+        self._buf: List[str] = []
+        self._seq = 0
+        self._last_flush = time.monotonic()
+        self._broken = False
+
+    def push(self, token: str) -> None:
+        if self._broken:
+            return
+        self._buf.append(token)
+        if time.monotonic() - self._last_flush >= self._interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._broken or not self._buf:
+            return
+        text = "".join(self._buf)
+        self._buf = []
+        self._last_flush = time.monotonic()
+        try:
+            self._seq = repo.publish_job_tokens(job_id=self._job_id, seq=self._seq, text=text)
+        except Exception:
+            self._broken = True
+            logger.warning(f"Token streaming for job {self._job_id} stopped: publish failed", exc_info=True)
+
+
+def _fetch_chunk(*, space_id: str, chunk: List[UUID], mode: str) -> Dict[str, Dict[str, Any]]:
+    def fetch(ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if mode == "per_page":
+            return {pid: fetch_page_content(space_id=space_id, page_id=pid) for pid in ids}
+        return fetch_page_contents(page_ids=ids)
+
+    ids = [str(pid) for pid in chunk]
+
+    found: Dict[str, Dict[str, Any]] = {}
+    if _page_source() == "mirror":
+        found = repo.get_mirror_pages(page_ids=ids)
+        ids = [pid for pid in ids if pid not in found]
+        if not ids:
+            return found
+
+    cache = get_page_cache()
+    if cache is None:
+        return {**found, **fetch(ids)}
+    return {**found, **cache.get_many(ids, fetch)}
+
+
+def _fetch_page_blobs(*, space_id: str, page_ids: List[UUID]) -> List[Dict[str, Any]]:
+    """
+    Fetches pages concurrently (WORKER_PAGE_FETCH_CONCURRENCY) and returns the blobs in
+    the original selection order, which build_messages relies on.
+    In "batch" mode each concurrent request carries up to WORKER_PAGE_FETCH_BATCH_SIZE ids.
+    """
+    if not page_ids:
+        return []
+
+    policy = _page_fetch_failure_policy()
+    mode = _page_fetch_mode()
+    size = 1 if mode == "per_page" else _page_fetch_batch_size()
+    chunks = [page_ids[i:i + size] for i in range(0, len(page_ids), size)]
+    fan_out = min(_page_fetch_concurrency(), len(chunks))
+
+    with ThreadPoolExecutor(max_workers=fan_out, thread_name_prefix="page-fetch") as pool:
+        futures = [pool.submit(_fetch_chunk, space_id=space_id, chunk=chunk, mode=mode) for chunk in chunks]
+
+        blobs = []
+        for chunk, fut in zip(chunks, futures):
+            try:
+                by_id = fut.result()
+            except Exception as e:
+                if policy == "fail":
+                    for other in futures:
+                        other.cancel()
+                    raise RuntimeError(f"Fetching page(s) {', '.join(map(str, chunk))} failed: {e}") from e
+                logger.warning(f"Skipping page(s) {', '.join(map(str, chunk))}: fetch failed: {e}")
+                continue
+
+            for pid in chunk:
+                blob = by_id.get(str(pid))
+                if blob is None:
+                    if policy == "fail":
+                        raise RuntimeError(f"Page {pid} not found in docmost")
+                    logger.warning(f"Skipping page {pid}: not found in docmost")
+                    continue
+                blobs.append(blob)
+        return blobs
+
+
+def _retrieve(
+    job: repo.JobRow, *, space_id: str, blobs: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Narrows pages to the chunks most relevant to job.message (RAG_ENABLED).
+    Retrieval is an optimization: if it fails, the job continues with the full pages.
+    """
+    if not retrieval_enabled():
+        return blobs, None
+    try:
+        narrowed, stats = retrieve(query=job.message, space_id=space_id, page_blobs=blobs)
+    except Exception as e:
+        logger.warning(f"Job {job.id}: retrieval failed, using full pages", exc_info=True)
+        return blobs, {"applied": False, "skipped_reason": f"error: {e}"}
+    if stats.applied:
+        logger.info(f"Job {job.id}: retrieval kept {stats.chunks_selected} chunks: {stats.to_dict()}")
+    return narrowed, stats.to_dict()
+
+
+def _job_fingerprint(job: repo.JobRow, versions: Dict[str, Optional[str]]) -> str:
+    """
+    sha256 over everything that determines the answer: message, selected pages with the
+    given versions (updated_at), model and OLLAMA_OPTIONS_JSON.
+    """
+    page_ids = sorted({str(pid) for pid in job.selected_page_ids})
+    raw = json.dumps(
+        {
+            "message": job.message,
+            "pages": [[pid, versions.get(pid)] for pid in page_ids],
+            "model": chat_model(),
+            "options": chat_options_json(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _live_fingerprint(job: repo.JobRow) -> Optional[str]:
+    """
+    Fingerprint over the pages' current versions (the fetcher's cheap versions endpoint),
+    used to look up a reusable answer. None when memoization is off or versions are unavailable.
+    """
+    if _job_memo_ttl_s() <= 0:
+        return None
+    page_ids = sorted({str(pid) for pid in job.selected_page_ids})
+    try:
+        versions = fetch_page_versions(page_ids=page_ids) if page_ids else {}
+    except Exception:
+        logger.warning(f"Job {job.id}: page versions unavailable, not memoizing", exc_info=True)
+        return None
+    return _job_fingerprint(job, versions)
+
+
+def _answered_fingerprint(job: repo.JobRow, blobs: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Fingerprint over the versions of the page bodies the answer was actually built from.
+    These can be older than the live versions (mirror lag, or a save between the version
+    check and the fetch); the answer is then stored under the older fingerprint, which a
+    lookup against current versions no longer matches.
+    """
+    if _job_memo_ttl_s() <= 0:
+        return None
+    versions: Dict[str, Optional[str]] = {}
+    for blob in blobs:
+        page = blob.get("page") or {}
+        if page.get("id"):
+            versions[str(page["id"])] = page.get("version")
+    return _job_fingerprint(job, versions)
+
+
+def _process_job(job: repo.JobRow) -> bool:
+    try:
+        if not job.space_id:
+            raise RuntimeError("job.space_id is required for docmost fetch")
+
+        space_id = str(job.space_id)
+
+        live_fingerprint = _live_fingerprint(job)
+        if live_fingerprint is not None:
+            memo = repo.find_memoized_result(
+                fingerprint=live_fingerprint, status="done", max_age_s=_job_memo_ttl_s()
+            )
+            if memo is not None:
+                source_id, final_text = memo
+                logger.info(f"Job {job.id}: identical to job {source_id}, reusing its answer")
+                repo.set_job_prompt_stats(job_id=job.id, prompt_stats={"memoized_from": str(source_id)})
+                repo.set_job_done(job_id=job.id, status="done", final_text=final_text, fingerprint=live_fingerprint)
+                return True
+
+        blobs = _fetch_page_blobs(space_id=space_id, page_ids=job.selected_page_ids)
+        # Taken before retrieval, which rewrites text_content but keeps each page's version.
+        fingerprint = _answered_fingerprint(job, blobs)
+        blobs, retrieval_stats = _retrieve(job, space_id=space_id, blobs=blobs)
+
+        messages, prompt_stats = build_prompt(user_message=job.message, page_blobs=blobs)
+        stats_dict = prompt_stats.to_dict()
+        if retrieval_stats is not None:
+            stats_dict["retrieval"] = retrieval_stats
+        repo.set_job_prompt_stats(job_id=job.id, prompt_stats=stats_dict)
+        if prompt_stats.tokens_dropped:
+            logger.info(f"Job {job.id}: prompt fitted to budget: {prompt_stats.to_dict()}")
+        if _token_streaming_enabled():
+            publisher = _TokenPublisher(job.id)
+            final_text = chat_stream(messages=messages, on_token=publisher.push)
+            publisher.flush()
+        else:
+            final_text = chat(messages=messages)
+
+        repo.set_job_done(job_id=job.id, status="done", final_text=final_text, fingerprint=fingerprint)
+        return True
+
+    except Exception as e:
+        logger.warning(f"Job {job.id} failed: {e}", exc_info=True)
+        repo.set_job_failed(job_id=job.id, status="failed", error_text=str(e))
+        return False
+
+
+def _slot_loop(
+    slot: int,
+    sub: Optional[Subscription],
+    stop: threading.Event,
+    stats: WorkerStats,
+    *,
+    poll_s: float,
+    fallback_s: float,
+) -> None:
+    """
+    One concurrency slot: claims through claim_next_job (FOR UPDATE SKIP LOCKED), so
+    slots in this and other worker processes never pick the same job.
+    """
+    while not stop.is_set():
+        try:
+            job = repo.claim_next_job(from_status="queued", to_status="running")
+        except Exception:
+            logger.warning(f"Worker slot {slot}: claim failed, retrying", exc_info=True)
+            stop.wait(poll_s)
+            continue
+
         if not job:
-            time.sleep(poll_s)
+            _wait_for_work(sub, poll_s=poll_s, fallback_s=fallback_s)
             continue
 
+        stats.started()
+        ok = False
         try:
-            if not job.space_id:
-                raise RuntimeError("job.space_id is required for docmost fetch")
+            ok = _process_job(job)
+        except Exception:
+            # set_job_failed itself failed; the job stays "running" and is logged for follow-up.
+            logger.exception(f"Worker slot {slot}: could not record result for job {job.id}")
+        finally:
+            stats.finished(ok=ok)
 
-            space_id = str(job.space_id)
 
-            blobs = []
-            for pid in job.selected_page_ids:
-                blobs.append(fetch_page_content(space_id=space_id, page_id=str(pid)))
+def _install_signal_handlers(stop: threading.Event, subs: List[Optional[Subscription]]) -> None:
+    def _handle(signum, _frame) -> None:
+        logger.info(f"Worker received signal {signum}, finishing in-flight jobs")
+        stop.set()
+        for sub in subs:
+            if sub is not None:
+                sub.wake()
 
-            messages = build_messages(user_message=job.message, page_blobs=blobs)
-            final_text = chat(messages=messages)
+    try:
+        signal.signal(signal.SIGTERM, _handle)
+        signal.signal(signal.SIGINT, _handle)
+    except ValueError:
+        # Not on the main thread (embedded use); caller is responsible for stopping us.
+        pass
+
+
+def run_forever(stop: Optional[threading.Event] = None) -> None:
+    # Ensure schema exists (safe if init.sql already handled it)
+    repo.ensure_schema()
+
+    poll_s = _poll_interval_s()
+    fallback_s = _fallback_poll_s()
+    concurrency = _worker_concurrency()
+    stop = stop or threading.Event()
+    stats = WorkerStats(concurrency)
+
+    # Subscribe before the first claim: a job queued in between still wakes us.
+    # One subscription per slot so a single NOTIFY wakes every idle slot; SKIP LOCKED
+    # decides which of them gets the job.
+    subs = [_subscribe_queue() for _ in range(concurrency)]
+    _install_signal_handlers(stop, subs)
+
+    threads = [
+        threading.Thread(
+            target=_slot_loop,
+            args=(i, subs[i], stop, stats),
+            kwargs={"poll_s": poll_s, "fallback_s": fallback_s},
+            name=f"worker-slot-{i}",
+            daemon=True,
+        )
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    logger.info(f"Worker started with {concurrency} slot(s)")
+
+    log_every_s = _stats_log_interval_s()
+    next_log = time.monotonic() + log_every_s
+    while not stop.is_set():
+        stop.wait(1.0)
+        if time.monotonic() >= next_log:
+            next_log = time.monotonic() + log_every_s
+            cache = get_page_cache()
+            logger.info(
+                f"Worker stats: {stats.snapshot()} llm: {llm_stats()} "
+                f"page_cache: {cache.stats() if cache else 'disabled'}"
+            )
 
-            repo.set_job_done(job_id=job.id, status="done", final_text=final_text)
+    # Graceful shutdown: slots finish the job they hold, then exit.
+    deadline = time.monotonic() + _shutdown_grace_s()
+    for t in threads:
+        t.join(timeout=max(0.0, deadline - time.monotonic()))
 
-        except Exception as e:
-            logger.warning(f"An Error occurred during runtime " + f"str(e)")
-            repo.set_job_failed(job_id=job.id, status="failed", error_text=str(e))
+    still_running = stats.snapshot()["in_flight"]
+    if still_running:
+        logger.warning(f"Worker shutdown grace expired with {still_running} job(s) still running")
+    for sub in subs:
+        if sub is not None:
+            sub.close()
+    logger.info(f"Worker stopped: {stats.snapshot()}")
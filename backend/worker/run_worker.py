@@ -1,4 +1,6 @@
 from backend.worker.loop import run_forever
+from logging_config import setup_logging
+setup_logging(_service="worker")
 
 if __name__ == "__main__":
     run_forever()
@@ -0,0 +1,171 @@
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ContentCache:
+    """
+    Normalized page text keyed by (page_id, version), version being the page's updated_at.
+    A page is only re-normalized when it has been saved since; a new version replaces the
+    old one. Bounded LRU in memory (max_entries, max_bytes), optionally backed by a sqlite
+    file (spill_path) that keeps one row per page and survives restarts: memory misses
+    fall through to it and every new version is written through to it.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int, spill_path: Optional[str] = None) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()  # page_id -> (version, text)
+        self._bytes = 0
+
+        self._spill: Optional[sqlite3.Connection] = None
+        self._spill_lock = threading.Lock()
+        if spill_path:
+            try:
+                self._spill = _open_spill(spill_path)
+            except sqlite3.Error:
+                logger.warning(f"Content cache spill at {spill_path} unavailable, memory only", exc_info=True)
+
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remember(self, page_id: str, version: str, text: str) -> None:
+        # Caller holds self._lock.
+        old = self._entries.pop(page_id, None)
+        if old is not None:
+            self._bytes -= sys.getsizeof(old[1])
+        if self._max_entries <= 0:
+            return
+        self._entries[page_id] = (version, text)
+        self._bytes += sys.getsizeof(text)
+        while self._entries and (
+            len(self._entries) > self._max_entries
+            or (self._max_bytes > 0 and self._bytes > self._max_bytes)
+        ):
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self._bytes -= sys.getsizeof(dropped)
+            self.evictions += 1
+
+    def _spill_get(self, page_id: str, version: str) -> Optional[str]:
+        if self._spill is None:
+            return None
+        try:
+            with self._spill_lock:
+                row = self._spill.execute(
+                    "SELECT text FROM normalized_content WHERE page_id = ? AND version = ?",
+                    (page_id, version),
+                ).fetchone()
+        except sqlite3.Error:
+            logger.warning("Content cache spill read failed", exc_info=True)
+            return None
+        return row[0] if row else None
+
+    def _spill_put(self, page_id: str, version: str, text: str) -> None:
+        if self._spill is None:
+            return
+        try:
+            with self._spill_lock, self._spill:
+                self._spill.execute(
+                    "INSERT OR REPLACE INTO normalized_content (page_id, version, text) VALUES (?, ?, ?)",
+                    (page_id, version, text),
+                )
+        except sqlite3.Error:
+            logger.warning("Content cache spill write failed", exc_info=True)
+
+    def normalized(
+        self, page_id: str, version: Optional[str], raw: str, normalize: Callable[[str], str]
+    ) -> str:
+        """
+        normalize(raw) for this page version, computed at most once per version.
+        Without a version there is nothing to key on and raw is normalized every time.
+        """
+        if version is None:
+            return normalize(raw)
+
+        with self._lock:
+            entry = self._entries.get(page_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(page_id)
+                self.hits += 1
+                return entry[1]
+
+        text = self._spill_get(page_id, version)
+        if text is not None:
+            with self._lock:
+                self.spill_hits += 1
+                self._remember(page_id, version, text)
+            return text
+
+        text = normalize(raw)
+        with self._lock:
+            self.misses += 1
+            self._remember(page_id, version, text)
+        self._spill_put(page_id, version, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "spill": self._spill is not None,
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _open_spill(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS normalized_content ("
+        " page_id TEXT PRIMARY KEY,"
+        " version TEXT NOT NULL,"
+        " text TEXT NOT NULL)"
+    )
+    conn.commit()
+    return conn
+
+
+_cache: Optional[ContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """
+    Process-wide cache from env: DOCMOST_FETCHER_CONTENT_CACHE_MAX_ENTRIES (4096, 0 = no
+    memory tier), DOCMOST_FETCHER_CONTENT_CACHE_MAX_BYTES (67108864, 0 = no byte limit) and
+    DOCMOST_FETCHER_CONTENT_CACHE_SPILL_PATH (sqlite file, unset = no spill).
+    """
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContentCache(
+                max_entries=int(os.getenv("DOCMOST_FETCHER_CONTENT_CACHE_MAX_ENTRIES", "4096") or "0"),
+                max_bytes=int(os.getenv("DOCMOST_FETCHER_CONTENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)) or "0"),
+                spill_path=(os.getenv("DOCMOST_FETCHER_CONTENT_CACHE_SPILL_PATH") or "").strip() or None,
+            )
+    return _cache
+
+
+def content_cache_stats() -> Dict[str, Any]:
+    return get_content_cache().stats()
@@ -1,12 +1,17 @@
+import base64
+import json
 import os
 import psycopg2
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import uuid
+from itertools import islice
 from psycopg2.extras import RealDictCursor
 
-from utils.schema_db_validation_management import validate_dict, refactor_content
+from utils.schema_db_validation_management import SCHEMA_VALIDATION_SAMPLE_SIZE, validate_dict, refactor_content
+from db_pool import Statement, execute_prepared, pooled_conn
+from content_cache import get_content_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,6 +23,23 @@ DB_NAME = os.getenv("DOCMOST_DB_NAME", "docmost")
 DB_USER = os.getenv("DOCMOST_DB_USER", "docmost")
 DB_PASS = os.getenv("DOCMOST_DB_PASSWORD", "STRONG_DB_PASSWORD")
 
+# Upper bound on ids accepted by get_contents_by_ids (one query, one response).
+MAX_BATCH_PAGE_IDS = int(os.getenv("DOCMOST_FETCHER_MAX_BATCH_PAGE_IDS", "500"))
+
+# Whole-space content dumps are the largest responses we validate; sample them by default.
+HOT_VALIDATION_MODE = os.getenv("SCHEMA_VALIDATION_MODE_HOT", "sample").strip().lower()
+
+# Rows per round-trip when streaming a space through a server-side cursor.
+STREAM_BATCH_ROWS = max(1, int(os.getenv("DOCMOST_FETCHER_STREAM_BATCH_ROWS", "200")))
+
+# Keyset page listing: default and maximum rows per request.
+PAGES_PAGE_SIZE = int(os.getenv("DOCMOST_FETCHER_PAGES_PAGE_SIZE", "500"))
+PAGES_MAX_PAGE_SIZE = int(os.getenv("DOCMOST_FETCHER_PAGES_MAX_PAGE_SIZE", "2000"))
+
+# Change feed (mirror sync): default and maximum rows per request.
+CHANGES_PAGE_SIZE = int(os.getenv("DOCMOST_FETCHER_CHANGES_PAGE_SIZE", "200"))
+CHANGES_MAX_PAGE_SIZE = int(os.getenv("DOCMOST_FETCHER_CHANGES_MAX_PAGE_SIZE", "1000"))
+
 allowed_types = (
     "content_single",
     "content_multi",
@@ -28,14 +50,189 @@ allowed_types = (
 )
 
 def _conn():
-    return psycopg2.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASS,
-        cursor_factory=RealDictCursor,
-    )
+    """
+    Borrow a pooled read-only connection (see db_pool); `with _conn() as c:` returns it on exit.
+    """
+    return pooled_conn()
+
+
+# ---------------------------------------- #
+# ---- FIXED SELECTS (PREPARED PER CONN) -- #
+# ---------------------------------------- #
+
+SPACES_ALL = Statement("dmf_spaces_all", """
+    SELECT id, name, created_at, updated_at, visibility
+    FROM public.spaces
+    WHERE deleted_at IS NULL
+    ORDER BY created_at ASC
+""")
+
+SPACE_BY_ID = Statement("dmf_space_by_id", """
+    SELECT id, name, created_at, updated_at, visibility
+    FROM public.spaces
+    WHERE id = $1
+      AND deleted_at IS NULL
+    ORDER BY created_at ASC
+""", ("uuid",))
+
+PAGES_BY_SPACE = Statement("dmf_pages_by_space", """
+    SELECT id, title, parent_page_id, creator_id, space_id, created_at, updated_at
+    FROM public.pages
+    WHERE space_id = $1
+      AND deleted_at IS NULL
+    ORDER BY created_at ASC
+""", ("uuid",))
+
+# Keyset pagination on (created_at, id): every page is an index range scan, however deep.
+# Wants an index on pages (space_id, created_at, id).
+_PAGES_KEYSET_SQL = """
+    SELECT id, title, parent_page_id, creator_id, space_id, created_at, updated_at
+    FROM public.pages
+    WHERE space_id = $1
+      AND deleted_at IS NULL
+      {after}
+    ORDER BY created_at ASC, id ASC
+    LIMIT $2
+"""
+
+PAGES_BY_SPACE_FIRST = Statement(
+    "dmf_pages_by_space_first", _PAGES_KEYSET_SQL.format(after=""), ("uuid", "int")
+)
+
+PAGES_BY_SPACE_AFTER = Statement(
+    "dmf_pages_by_space_after",
+    _PAGES_KEYSET_SQL.format(after="AND (created_at, id) > ($3, $4)"),
+    ("uuid", "int", "timestamptz", "uuid"),
+)
+
+# Direct children of one parent (or the roots) with each child's own child count, so a
+# tree can draw expand toggles without loading deeper levels.
+# Wants an index on pages (space_id, parent_page_id) (see README, "DOCMOST DB INDEXES").
+_CHILD_PAGES_SQL = """
+    SELECT p.id, p.title, p.parent_page_id, p.creator_id, p.space_id, p.created_at, p.updated_at,
+           (SELECT count(*)
+              FROM public.pages c
+             WHERE c.space_id = p.space_id
+               AND c.parent_page_id = p.id
+               AND c.deleted_at IS NULL) AS child_count
+    FROM public.pages p
+    WHERE p.space_id = $1
+      AND {parent}
+      AND p.deleted_at IS NULL
+    ORDER BY lower(coalesce(p.title, '')) ASC, p.id ASC
+"""
+
+ROOT_PAGES = Statement(
+    "dmf_root_pages", _CHILD_PAGES_SQL.format(parent="p.parent_page_id IS NULL"), ("uuid",)
+)
+
+CHILD_PAGES = Statement(
+    "dmf_child_pages", _CHILD_PAGES_SQL.format(parent="p.parent_page_id = $2"), ("uuid", "uuid")
+)
+
+# Change feed for mirrors: every page (soft-deleted ones included) ordered by the time it
+# last changed. A soft delete does not have to touch updated_at, so deleted_at counts too.
+# The inner query picks the next batch from (id, changed_at) only; bodies are joined in for
+# those rows alone. With a watermark, the updated_at/deleted_at range filter comes first so
+# the pages_updated_at_idx / pages_deleted_at_idx indexes (README) bound the rows considered;
+# only the initial sync (no watermark) reads the whole table.
+_PAGE_CHANGES_SQL = """
+    SELECT p.id, p.space_id, p.title, p.parent_page_id, p.creator_id, p.created_at,
+           p.updated_at, p.deleted_at, p.text_content, c.changed_at
+    FROM (
+        SELECT id, GREATEST(updated_at, COALESCE(deleted_at, updated_at)) AS changed_at
+        FROM public.pages
+        {after}
+        ORDER BY changed_at ASC, id ASC
+        LIMIT $1
+    ) c
+    JOIN public.pages p ON p.id = c.id
+    ORDER BY c.changed_at ASC, c.id ASC
+"""
+
+PAGE_CHANGES_FIRST = Statement(
+    "dmf_page_changes_first", _PAGE_CHANGES_SQL.format(after=""), ("int",)
+)
+
+PAGE_CHANGES_AFTER = Statement(
+    "dmf_page_changes_after",
+    _PAGE_CHANGES_SQL.format(after="""WHERE (updated_at >= $2 OR deleted_at >= $2)
+          AND (GREATEST(updated_at, COALESCE(deleted_at, updated_at)), id) > ($2, $3)"""),
+    ("int", "timestamptz", "uuid"),
+)
+
+CONTENT_BY_ID = Statement("dmf_content_by_id", """
+    SELECT id, text_content, space_id, title, parent_page_id, creator_id, created_at, updated_at
+    FROM public.pages
+    WHERE id = $1
+    AND deleted_at IS NULL
+""", ("uuid",))
+
+CONTENTS_BY_IDS = Statement("dmf_contents_by_ids", """
+    SELECT id, title, text_content, parent_page_id, creator_id, space_id, created_at, updated_at
+    FROM public.pages
+    WHERE id = ANY($1)
+      AND deleted_at IS NULL
+""", ("uuid[]",))
+
+VERSIONS_BY_IDS = Statement("dmf_versions_by_ids", """
+    SELECT id, updated_at
+    FROM public.pages
+    WHERE id = ANY($1)
+      AND deleted_at IS NULL
+""", ("uuid[]",))
+
+# One round-trip for a whole space. LEFT JOIN so an existing space without pages still
+# yields one row (page columns NULL), which tells "empty space" apart from "no such space".
+_SPACE_PAGES_SQL = """
+    SELECT s.id AS space_id, p.id, p.title, p.parent_page_id, p.creator_id,
+           p.created_at, p.updated_at{content_column}
+    FROM public.spaces s
+    LEFT JOIN public.pages p
+      ON p.space_id = s.id
+     AND p.deleted_at IS NULL
+    WHERE s.id = $1
+      AND s.deleted_at IS NULL
+    ORDER BY p.created_at ASC
+"""
+
+SPACE_PAGES_WITH_CONTENT = Statement(
+    "dmf_space_pages_with_content", _SPACE_PAGES_SQL.format(content_column=", p.text_content"), ("uuid",)
+)
+
+SPACE_PAGES_META = Statement(
+    "dmf_space_pages_meta", _SPACE_PAGES_SQL.format(content_column=""), ("uuid",)
+)
+
+# Fingerprints for ETags: (row count, max(updated_at)) of the set a listing is built from.
+SPACES_FINGERPRINT_ALL = Statement("dmf_spaces_fingerprint_all", """
+    SELECT count(*) AS n, max(updated_at) AS max_updated_at
+    FROM public.spaces
+    WHERE deleted_at IS NULL
+""")
+
+SPACES_FINGERPRINT_ONE = Statement("dmf_spaces_fingerprint_one", """
+    SELECT count(*) AS n, max(updated_at) AS max_updated_at
+    FROM public.spaces
+    WHERE id = $1
+      AND deleted_at IS NULL
+""", ("uuid",))
+
+PAGES_FINGERPRINT = Statement("dmf_pages_fingerprint", """
+    SELECT count(*) AS n, max(updated_at) AS max_updated_at
+    FROM public.pages
+    WHERE space_id = $1
+      AND deleted_at IS NULL
+""", ("uuid",))
+
+# IMPORTANT: Docmost schema may store content in a different table/column.
+# This assumes public.pages has text_content. If not, change this SQL to the correct table.
+SPACE_CONTENTS_BY_IDS = Statement("dmf_space_contents_by_ids", """
+    SELECT id, title, text_content, updated_at
+    FROM public.pages
+    WHERE id = ANY($1)
+      AND deleted_at IS NULL
+""", ("uuid[]",))
 
 
 def get_space(space_id: str) -> tuple[bool, dict[Any, Any]]:
@@ -43,26 +240,15 @@ def get_space(space_id: str) -> tuple[bool, dict[Any, Any]]:
 
 def get_spaces(space_id: Optional[str] = None) -> tuple[bool, dict[Any, Any]]:
     if space_id:
-        sql = """
-            SELECT id, name, created_at, updated_at, visibility
-            FROM public.spaces
-            WHERE id = %s
-              AND deleted_at IS NULL
-            ORDER BY created_at ASC
-        """
+        stmt = SPACE_BY_ID
         params = (space_id,)
     else:
-        sql = """
-            SELECT id, name, created_at, updated_at, visibility
-            FROM public.spaces
-            WHERE deleted_at IS NULL
-            ORDER BY created_at ASC
-        """
-        params = None
+        stmt = SPACES_ALL
+        params = ()
 
     with _conn() as c:
         with c.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql, params) if params else cur.execute(sql)
+            execute_prepared(cur, stmt, params)
             rows = cur.fetchall()
 
     if not rows:
@@ -79,6 +265,40 @@ def get_spaces(space_id: Optional[str] = None) -> tuple[bool, dict[Any, Any]]:
     return contents
 
 
+def _fingerprint(stmt: Statement, params: tuple) -> tuple[int, Optional[str]]:
+    with _conn() as c:
+        with c.cursor(cursor_factory=RealDictCursor) as cur:
+            execute_prepared(cur, stmt, params)
+            row = cur.fetchone()
+    return int(row["n"]), _page_version(row["max_updated_at"])
+
+
+def get_spaces_fingerprint(space_id: Optional[str] = None) -> Optional[tuple[int, Optional[str]]]:
+    """
+    (row count, max(updated_at)) of the spaces get_spaces(space_id) would return;
+    changes whenever that listing can change. None for an invalid space_id.
+    """
+    if not space_id:
+        return _fingerprint(SPACES_FINGERPRINT_ALL, ())
+    try:
+        space_id = str(uuid.UUID(str(space_id)))
+    except ValueError:
+        return None
+    return _fingerprint(SPACES_FINGERPRINT_ONE, (space_id,))
+
+
+def get_pages_fingerprint(space_id: str) -> Optional[tuple[int, Optional[str]]]:
+    """
+    (row count, max(updated_at)) of a space's live pages; covers every page listing of
+    that space (keyset pages, children and child counts). None for an invalid space_id.
+    """
+    try:
+        space_id = str(uuid.UUID(str(space_id)))
+    except ValueError:
+        return None
+    return _fingerprint(PAGES_FINGERPRINT, (space_id,))
+
+
 def get_page(page_id: str) -> tuple[bool, dict[Any, Any]]:
     pass
 
@@ -114,14 +334,7 @@ def get_pages(spaces_dict: Dict[str, Any]) -> Dict[str, Any]:
                     )
                     continue
 
-                sql = """
-                    SELECT id, title, parent_page_id, creator_id, space_id, created_at, updated_at
-                    FROM public.pages
-                    WHERE space_id = %s
-                      AND deleted_at IS NULL
-                    ORDER BY created_at ASC
-                """
-                cur.execute(sql, (space_id,))
+                execute_prepared(cur, PAGES_BY_SPACE, (space_id,))
                 rows = cur.fetchall()
 
                 # Always initialize the container for this space_id
@@ -141,6 +354,206 @@ def get_pages(spaces_dict: Dict[str, Any]) -> Dict[str, Any]:
     return contents
 
 
+def _encode_pages_cursor(created_at: Any, page_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), page_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_pages_cursor(cursor: str) -> Optional[tuple[str, str]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, page_id = json.loads(raw)
+        return str(created_at), str(uuid.UUID(str(page_id)))
+    except (ValueError, TypeError):
+        return None
+
+
+def get_pages_page(
+    space_id: str, *, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> tuple[bool, dict[Any, Any]]:
+    """
+    One page of a space's page metadata, ordered by (created_at, id).
+    cursor is the opaque next_cursor of the previous call (None for the first page).
+
+    Output:
+      {
+        "pages": [ { "id": ..., ...page meta... }, ... ],
+        "next_cursor": str | None      # None once the listing is exhausted
+      }
+    """
+    try:
+        space_id = str(uuid.UUID(str(space_id)))
+    except ValueError:
+        return False, {
+            "error": "Invalid space_id type",
+            "message": "Encountered incorrect space_id, expected str(uuid.UUID)",
+            "value": f"{space_id}",
+        }
+
+    limit = PAGES_PAGE_SIZE if limit is None else limit
+    if limit < 1 or limit > PAGES_MAX_PAGE_SIZE:
+        return False, {
+            "error": "Invalid limit",
+            "message": f"limit must be between 1 and {PAGES_MAX_PAGE_SIZE}",
+            "value": limit,
+        }
+
+    # One extra row tells us whether there is a next page without a COUNT.
+    if cursor:
+        after = _decode_pages_cursor(cursor)
+        if after is None:
+            return False, {
+                "error": "Invalid cursor",
+                "message": "cursor is not a value returned as next_cursor",
+                "value": cursor,
+            }
+        stmt, params = PAGES_BY_SPACE_AFTER, (space_id, limit + 1, *after)
+    else:
+        stmt, params = PAGES_BY_SPACE_FIRST, (space_id, limit + 1)
+
+    with _conn() as c:
+        with c.cursor(cursor_factory=RealDictCursor) as cur:
+            execute_prepared(cur, stmt, params)
+            rows = cur.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    pages = [
+        {
+            "id": str(row["id"]),
+            "title": row["title"],
+            "parent_page_id": row["parent_page_id"],
+            "creator_id": row["creator_id"],
+            "space_id": row["space_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        for row in rows
+    ]
+    next_cursor = _encode_pages_cursor(rows[-1]["created_at"], str(rows[-1]["id"])) if has_more else None
+    return True, {"pages": pages, "next_cursor": next_cursor}
+
+
+def get_child_pages(space_id: str, parent_page_id: Optional[str] = None) -> tuple[bool, dict[Any, Any]]:
+    """
+    Direct children of parent_page_id in a space, or the root pages when it is None.
+    Ordered by title (case-insensitive), then id. Each page carries child_count.
+
+    Output:
+      {
+        "parent_page_id": str | None,
+        "pages": [ { "id": ..., ...page meta..., "child_count": int }, ... ]
+      }
+    """
+    try:
+        space_id = str(uuid.UUID(str(space_id)))
+        if parent_page_id is not None:
+            parent_page_id = str(uuid.UUID(str(parent_page_id)))
+    except ValueError:
+        return False, {
+            "error": "Invalid id type",
+            "message": "Encountered incorrect space_id or parent_page_id, expected str(uuid.UUID)",
+            "value": {"space_id": f"{space_id}", "parent_page_id": f"{parent_page_id}"},
+        }
+
+    if parent_page_id is None:
+        stmt, params = ROOT_PAGES, (space_id,)
+    else:
+        stmt, params = CHILD_PAGES, (space_id, parent_page_id)
+
+    with _conn() as c:
+        with c.cursor(cursor_factory=RealDictCursor) as cur:
+            execute_prepared(cur, stmt, params)
+            rows = cur.fetchall()
+
+    pages = [
+        {
+            "id": str(row["id"]),
+            "title": row["title"],
+            "parent_page_id": row["parent_page_id"],
+            "creator_id": row["creator_id"],
+            "space_id": row["space_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "child_count": int(row["child_count"]),
+        }
+        for row in rows
+    ]
+    return True, {"parent_page_id": parent_page_id, "pages": pages}
+
+
+def get_page_changes(
+    *, after_changed_at: Optional[str] = None, after_id: Optional[str] = None, limit: Optional[int] = None
+) -> tuple[bool, dict[Any, Any]]:
+    """
+    Pages changed after the (changed_at, id) position, oldest change first, where
+    changed_at is the later of updated_at and deleted_at. Soft-deleted pages are included
+    with deleted_at set and text_content None; live pages carry normalized text_content.
+    Callers keep the last row's (changed_at, id) as their watermark.
+
+    Output:
+      {
+        "pages": [ { "id", "space_id", ...page meta..., "deleted_at", "changed_at",
+                     "version", "text_content" }, ... ],
+        "has_more": bool
+      }
+    """
+    limit = CHANGES_PAGE_SIZE if limit is None else limit
+    if limit < 1 or limit > CHANGES_MAX_PAGE_SIZE:
+        return False, {
+            "error": "Invalid limit",
+            "message": f"limit must be between 1 and {CHANGES_MAX_PAGE_SIZE}",
+            "value": limit,
+        }
+
+    if after_changed_at:
+        try:
+            after_id = str(uuid.UUID(str(after_id or "00000000-0000-0000-0000-000000000000")))
+        except ValueError:
+            return False, {
+                "error": "Invalid after_id type",
+                "message": "Encountered incorrect after_id, expected str(uuid.UUID)",
+                "value": f"{after_id}",
+            }
+        stmt, params = PAGE_CHANGES_AFTER, (limit + 1, after_changed_at, after_id)
+    else:
+        stmt, params = PAGE_CHANGES_FIRST, (limit + 1,)
+
+    with _conn() as c:
+        with c.cursor(cursor_factory=RealDictCursor) as cur:
+            try:
+                execute_prepared(cur, stmt, params)
+            except psycopg2.DataError as e:
+                return False, {
+                    "error": "Invalid after_changed_at",
+                    "message": f"after_changed_at is not a timestamp: {e}",
+                    "value": after_changed_at,
+                }
+            rows = cur.fetchall()
+
+    has_more = len(rows) > limit
+    pages = []
+    for row in rows[:limit]:
+        deleted = row["deleted_at"] is not None
+        text_content = row["text_content"]
+        pages.append({
+            "id": str(row["id"]),
+            "space_id": row["space_id"],
+            "title": row["title"],
+            "parent_page_id": row["parent_page_id"],
+            "creator_id": row["creator_id"],
+            # ISO strings at full precision (jsonify would render datetimes as HTTP dates).
+            "created_at": _page_version(row["created_at"]),
+            "updated_at": _page_version(row["updated_at"]),
+            "deleted_at": _page_version(row["deleted_at"]),
+            "changed_at": _page_version(row["changed_at"]),
+            "version": _page_version(row["updated_at"]),
+            "text_content": None if deleted else _normalized_content(row["id"], row["updated_at"], text_content),
+        })
+    return True, {"pages": pages, "has_more": has_more}
+
+
 def get_content(_page_id: str) -> tuple[bool, dict[Any, Any]]:
     if type(_page_id) != uuid.UUID:
         try:
@@ -152,47 +565,165 @@ def get_content(_page_id: str) -> tuple[bool, dict[Any, Any]]:
                 "value": f"{_page_id}",
             }
 
-    sql = """
-        Select id, text_content, space_id
-        FROM public.pages
-        WHERE id = %s
-        AND deleted_at IS NULL
-    """
-
-    params = _page_id
+    params = str(_page_id)
 
     with _conn() as c:
         with c.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(sql, (params,))
+            execute_prepared(cur, CONTENT_BY_ID, (params,))
             row = cur.fetchone()
             if row:
-                __content = refactor_content(row["text_content"])
+                __content = _normalized_content(row["id"], row["updated_at"], row["text_content"])
                 __space_id = str(row["space_id"])
                 __page_id = str(row["id"])
 
-                sql_meta = """
-                    SELECT title, parent_page_id, creator_id, created_at, updated_at
-                    FROM public.pages
-                    WHERE id = %s
-                    AND deleted_at IS NULL
-                """
-                cur.execute(sql_meta, (params,))
-                __meta = cur.fetchone()
-
                 output = {
                     __space_id: {
                         __page_id: {
-                            key: val for key, val in __meta.items()
+                            key: row[key]
+                            for key in ("title", "parent_page_id", "creator_id", "created_at", "updated_at")
                         }
                     }
                 }
 
                 output[__space_id][__page_id]["text_content"] = __content
+                output[__space_id][__page_id]["version"] = _page_version(row["updated_at"])
                 return output
             else:
                 # TODO verify that we are not intending to build a replacement dict as empty output
                 return None
 
+
+def get_contents_by_ids(page_ids: List[str]) -> tuple[bool, dict[Any, Any]]:
+    """
+    Batch variant of get_content: resolves every page id with one
+    WHERE id = ANY(...) query instead of two SELECTs per page.
+
+    Output:
+      {
+        "pages": {
+          page_id: { ...page meta..., "space_id": str, "text_content": str, "version": str },
+          ...
+        },
+        "missing": [page_id, ...]   # unknown or deleted, in request order
+      }
+    """
+    ok, ids = _normalize_page_ids(page_ids)
+    if not ok:
+        return False, ids
+
+    if not ids:
+        return True, {"pages": {}, "missing": []}
+
+    with _conn() as c:
+        with c.cursor(cursor_factory=RealDictCursor) as cur:
+            execute_prepared(cur, CONTENTS_BY_IDS, (ids,))
+            rows = cur.fetchall()
+
+    pages: Dict[str, Any] = {}
+    for row in rows:
+        text_content = row.get("text_content")
+        pages[str(row["id"])] = {
+            "title": row["title"],
+            "parent_page_id": row["parent_page_id"],
+            "creator_id": row["creator_id"],
+            "space_id": str(row["space_id"]),
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "text_content": _normalized_content(row["id"], row["updated_at"], text_content),
+            "version": _page_version(row["updated_at"]),
+        }
+
+    return True, {"pages": pages, "missing": [pid for pid in ids if pid not in pages]}
+
+
+def get_page_versions(page_ids: List[str]) -> tuple[bool, dict[Any, Any]]:
+    """
+    Cheap revalidation for content caches: only id and updated_at, no page bodies.
+
+    Output:
+      {
+        "versions": { page_id: version, ... },
+        "missing": [page_id, ...]
+      }
+    """
+    ok, ids = _normalize_page_ids(page_ids)
+    if not ok:
+        return False, ids
+
+    if not ids:
+        return True, {"versions": {}, "missing": []}
+
+    with _conn() as c:
+        with c.cursor(cursor_factory=RealDictCursor) as cur:
+            execute_prepared(cur, VERSIONS_BY_IDS, (ids,))
+            rows = cur.fetchall()
+
+    versions = {str(row["id"]): _page_version(row["updated_at"]) for row in rows}
+    return True, {"versions": versions, "missing": [pid for pid in ids if pid not in versions]}
+
+
+def _page_version(updated_at: Any) -> Optional[str]:
+    # Full-precision ISO string: jsonify() renders datetimes to whole seconds,
+    # which is too coarse to tell two saves apart.
+    return updated_at.isoformat() if updated_at is not None else None
+
+
+def _validation_error(info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Error body for a response that failed validate_dict: where and why it failed
+    (error code, depth, expected/got type names), never the rejected payload itself.
+    """
+    detail = {
+        key: sorted(getattr(t, "__name__", str(t)) for t in value) if isinstance(value, list) else value
+        for key, value in info.items()
+        if key != "ok"
+    }
+    return {
+        "error": "Invalid multi_content structure",
+        "message": f"validate_dict rejected the structure: {detail.get('error')}",
+        "value": detail,
+    }
+
+
+def _normalized_content(page_id: Any, updated_at: Any, text_content: Optional[str]) -> Optional[str]:
+    """
+    refactor_content(text_content), reused from the content cache while the page's
+    updated_at is unchanged.
+    """
+    if text_content is None:
+        return None
+    return get_content_cache().normalized(str(page_id), _page_version(updated_at), text_content, refactor_content)
+
+
+def _normalize_page_ids(page_ids: List[str]) -> tuple[bool, Any]:
+    """
+    Validates, canonicalizes and de-duplicates (order kept) a page id list for
+    the batch queries. Returns (True, ids) or (False, error dict).
+    """
+    ids: List[str] = []
+    seen = set()
+    for raw in page_ids or []:
+        try:
+            pid = str(uuid.UUID(str(raw)))
+        except ValueError:
+            return False, {
+                "error": "Invalid page_id type",
+                "message": "Encountered incorrect page_id in page_ids, expected str(uuid.UUID)",
+                "value": f"{raw}",
+            }
+        if pid not in seen:
+            seen.add(pid)
+            ids.append(pid)
+
+    if len(ids) > MAX_BATCH_PAGE_IDS:
+        return False, {
+            "error": "Too many page ids",
+            "message": f"At most {MAX_BATCH_PAGE_IDS} page ids per batch request",
+            "value": len(ids),
+        }
+    return True, ids
+
+
 def get_contents(
         pages_by_space: Optional[Dict[str, Any]] = None, *, space_id: Optional[str] = None,
 ) -> tuple[bool, dict[Any, Any]]:
@@ -253,21 +784,13 @@ def get_contents(
                     )
                     continue
 
-                page_ids = [uuid.UUID(pid) for pid in pages.keys()]
+                page_ids = [str(uuid.UUID(pid)) for pid in pages.keys()]
                 out[sid] = {}
 
                 if not page_ids:
                     continue
 
-                # IMPORTANT: Docmost schema may store content in a different table/column.
-                # This assumes public.pages has text_content. If not, change this SQL to the correct table.
-                sql = """
-                    SELECT id, title, text_content, updated_at
-                    FROM public.pages
-                    WHERE id = ANY(%s)
-                      AND deleted_at IS NULL
-                """
-                cur.execute(sql, (page_ids,))
+                execute_prepared(cur, SPACE_CONTENTS_BY_IDS, (page_ids,))
                 rows = cur.fetchall()
                 content_by_id = {str(r["id"]): r for r in rows}
 
@@ -275,11 +798,10 @@ def get_contents(
                     row = content_by_id.get(pid)
                     out[sid][pid] = dict(meta)
                     if row:
-                        title = row["title"]
-                        print("Name of file: " + title)
+                        logger.debug(f"Name of file: {row['title']}")
                         text_content = row.get("text_content")
 
-                        refactored_text_content = refactor_content(text_content)
+                        refactored_text_content = _normalized_content(row["id"], row["updated_at"], text_content)
 
                         out[sid][pid]["text_content"] = refactored_text_content
                         out[sid][pid]["content_updated_at"] = row.get("updated_at")
@@ -288,15 +810,191 @@ def get_contents(
                         out[sid][pid]["content_updated_at"] = None
     # Before returning out, ensure the formatting of multi_pages_content are according to formatting expectations
     this_type = allowed_types[allowed_types.index("content_multi")]
-    is_valid, is_valid_message = validate_dict(out, this_type)
+    is_valid, is_valid_message = validate_dict(out, this_type, mode=HOT_VALIDATION_MODE)
     if is_valid:
         return True, out
     else:
+        return False, _validation_error(is_valid_message)
+
+
+def get_space_contents(space_id: str, *, include_content: bool = True) -> tuple[bool, dict[Any, Any]]:
+    """
+    Single-query replacement for get_spaces -> get_pages -> get_contents on one space.
+    Rows are written straight into the response structure (no intermediate per-step dicts).
+    With include_content=False, text_content is neither selected nor normalized.
+
+    Output (same shape as get_contents):
+      {
+        space_id: {
+          page_id: {
+            ...page meta...,
+            "text_content": "...",          # only with include_content
+            "content_updated_at": ...,      # only with include_content
+          }
+        }
+      }
+    Returns (False, error) with error "space_not_found" if the space does not exist.
+    """
+    try:
+        space_id = str(uuid.UUID(str(space_id)))
+    except ValueError:
         return False, {
-            "error": "Invalid multi_content structure",
-            "message": f"validate_dict has discarded the formatting as invalid {str(is_valid_message)}",
-            "value": f"{out}",
+            "error": "Invalid space_id type",
+            "message": "Encountered incorrect space_id, expected str(uuid.UUID)",
+            "value": f"{space_id}",
         }
 
+    stmt = SPACE_PAGES_WITH_CONTENT if include_content else SPACE_PAGES_META
+
+    pages: Optional[Dict[str, Any]] = None
+    with _conn() as c:
+        with c.cursor(cursor_factory=RealDictCursor) as cur:
+            execute_prepared(cur, stmt, (space_id,))
+            for row in cur:
+                if pages is None:
+                    pages = {}
+                if row["id"] is None:
+                    continue
+
+                page = {
+                    "title": row["title"],
+                    "parent_page_id": row["parent_page_id"],
+                    "creator_id": row["creator_id"],
+                    "space_id": row["space_id"],
+                    "created_at": row["created_at"],
+                    "updated_at": row["updated_at"],
+                }
+                if include_content:
+                    text_content = row["text_content"]
+                    page["text_content"] = _normalized_content(row["id"], row["updated_at"], text_content)
+                    page["content_updated_at"] = row["updated_at"]
+                pages[str(row["id"])] = page
+
+    if pages is None:
+        return False, {
+            "error": "space_not_found",
+            "message": f"No space found for given space_id {space_id}",
+            "value": None,
+        }
 
+    out = {space_id: pages}
 
+    # Before returning out, ensure the formatting of multi_pages_content are according to formatting expectations
+    this_type = allowed_types[allowed_types.index("content_multi")]
+    is_valid, is_valid_message = validate_dict(out, this_type, mode=HOT_VALIDATION_MODE)
+    if is_valid:
+        return True, out
+    else:
+        return False, _validation_error(is_valid_message)
+
+
+def stream_space_contents(
+    space_id: str, *, include_content: bool = True
+) -> tuple[bool, Any]:
+    """
+    Streaming variant of get_space_contents for spaces too large to hold in memory.
+    Checks the space up front, then returns (True, iterator of (page_id, page)) where
+    the iterator reads rows through a server-side cursor, STREAM_BATCH_ROWS at a time.
+    Pages have the same fields as in get_space_contents.
+
+    Validation follows SCHEMA_VALIDATION_MODE_HOT like the non-streaming path: the first
+    SCHEMA_VALIDATION_SAMPLE_SIZE pages are read and validated before anything is sent, so a
+    failure is still an ordinary (False, error). In "full" mode every later page is validated
+    as it streams; a failure there ends the iterator with an error (the response is truncated).
+
+    Returns (False, error) like get_space_contents for an invalid or unknown space.
+    """
+    try:
+        space_id = str(uuid.UUID(str(space_id)))
+    except ValueError:
+        return False, {
+            "error": "Invalid space_id type",
+            "message": "Encountered incorrect space_id, expected str(uuid.UUID)",
+            "value": f"{space_id}",
+        }
+
+    with _conn() as c:
+        with c.cursor() as cur:
+            execute_prepared(cur, SPACE_BY_ID, (space_id,))
+            exists = cur.fetchone() is not None
+    if not exists:
+        return False, {
+            "error": "space_not_found",
+            "message": f"No space found for given space_id {space_id}",
+            "value": None,
+        }
+
+    pages = _iter_space_pages(space_id, include_content=include_content)
+    if HOT_VALIDATION_MODE == "off":
+        return True, pages
+
+    head = list(islice(pages, SCHEMA_VALIDATION_SAMPLE_SIZE))
+    ok, info = _validate_space_pages(space_id, head)
+    if not ok:
+        pages.close()
+        return False, _validation_error(info)
+    return True, _validated_pages(space_id, head, pages, full=HOT_VALIDATION_MODE == "full")
+
+
+def _validate_space_pages(space_id: str, pages: List[Tuple[str, Dict[str, Any]]]) -> tuple[bool, dict]:
+    this_type = allowed_types[allowed_types.index("content_multi")]
+    return validate_dict({space_id: dict(pages)}, this_type, mode="full")
+
+
+def _validated_pages(
+    space_id: str,
+    head: List[Tuple[str, Dict[str, Any]]],
+    rest: Iterator[Tuple[str, Dict[str, Any]]],
+    *,
+    full: bool,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    try:
+        yield from head
+        for item in rest:
+            if full:
+                ok, info = _validate_space_pages(space_id, [item])
+                if not ok:
+                    raise ValueError(f"Page {item[0]} failed validation: {_validation_error(info)['value']}")
+            yield item
+    finally:
+        rest.close()
+
+
+def _iter_space_pages(space_id: str, *, include_content: bool) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    stmt = SPACE_PAGES_WITH_CONTENT if include_content else SPACE_PAGES_META
+
+    # The pooled connection stays checked out until the iterator is exhausted or closed
+    # (Flask closes it when the client goes away).
+    with _conn() as c:
+        # Named cursors only live inside a transaction; pooled connections are autocommit.
+        # The session stays read-only, so this is a READ ONLY transaction.
+        c.autocommit = False
+        try:
+            with c.cursor(name=f"dmf_stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor) as cur:
+                cur.itersize = STREAM_BATCH_ROWS
+                cur.execute(stmt.plain_sql, stmt.bind((space_id,)))
+                for row in cur:
+                    if row["id"] is None:
+                        # Space without pages (LEFT JOIN row).
+                        continue
+
+                    page = {
+                        "title": row["title"],
+                        "parent_page_id": row["parent_page_id"],
+                        "creator_id": row["creator_id"],
+                        "space_id": row["space_id"],
+                        "created_at": row["created_at"],
+                        "updated_at": row["updated_at"],
+                    }
+                    if include_content:
+                        text_content = row["text_content"]
+                        page["text_content"] = _normalized_content(row["id"], row["updated_at"], text_content)
+                        page["content_updated_at"] = row["updated_at"]
+                    yield str(row["id"]), page
+        finally:
+            if not c.closed:
+                try:
+                    c.rollback()
+                    c.autocommit = True
+                except psycopg2.Error:
+                    logger.warning("Could not reset streaming connection", exc_info=True)
@@ -0,0 +1,330 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import RealDictCursor
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class _PooledConn:
+    __slots__ = ("conn", "created_at", "last_used_at", "prepared")
+
+    def __init__(self, conn) -> None:
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used_at = now
+        # Names of server-side prepared statements that exist on this connection.
+        self.prepared: Set[str] = set()
+
+
+class ReadOnlyPool:
+    """
+    Thread-safe pool of read-only, autocommit connections to the Docmost DB.
+    Read-only + autocommit means no BEGIN/COMMIT round-trips and no way to write by mistake.
+    Connections are recycled after max_lifetime_s and dropped if they come back broken;
+    ones idle longer than health_check_idle_s are pinged (SELECT 1) before being handed out,
+    so a connection the Docmost side dropped is replaced instead of failing the request.
+    """
+
+    def __init__(self, *, connect_kwargs: Dict[str, Any], min_size: int, max_size: int,
+                 timeout_s: float, max_lifetime_s: float, health_check_idle_s: float) -> None:
+        self._connect_kwargs = connect_kwargs
+        self._min_size = max(0, min(min_size, max_size))
+        self._max_size = max(1, max_size)
+        self._timeout_s = timeout_s
+        self._max_lifetime_s = max_lifetime_s
+        self._health_check_idle_s = health_check_idle_s
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledConn] = []
+        self._in_use: Dict[int, _PooledConn] = {}
+        self._opening = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total_s = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._health_failures = 0
+        self._prepares = 0
+        self._executes = 0
+
+    def _open(self) -> _PooledConn:
+        conn = psycopg2.connect(cursor_factory=RealDictCursor, **self._connect_kwargs)
+        conn.set_session(readonly=True, autocommit=True)
+        return _PooledConn(conn)
+
+    def _expired(self, pc: _PooledConn) -> bool:
+        return self._max_lifetime_s > 0 and (time.monotonic() - pc.created_at) >= self._max_lifetime_s
+
+    def _is_healthy(self, pc: _PooledConn) -> bool:
+        if pc.conn.closed:
+            return False
+        if self._health_check_idle_s < 0 or (time.monotonic() - pc.last_used_at) < self._health_check_idle_s:
+            return True
+        try:
+            with pc.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def checkout(self) -> _PooledConn:
+        started = time.monotonic()
+        deadline = started + self._timeout_s
+        waited = False
+
+        while True:
+            with self._cond:
+                pc: Optional[_PooledConn] = None
+                while pc is None:
+                    if self._idle:
+                        pc = self._idle.pop()
+                        self._in_use[id(pc.conn)] = pc
+                        break
+                    if len(self._idle) + len(self._in_use) + self._opening < self._max_size:
+                        self._opening += 1
+                        break
+                    if not waited:
+                        waited = True
+                        self._waits += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(f"No Docmost DB connection free within {self._timeout_s:.1f}s")
+                    self._cond.wait(remaining)
+
+            if pc is None:
+                try:
+                    pc = self._open()
+                except BaseException:
+                    with self._cond:
+                        self._opening -= 1
+                        # The slot is free again; let a waiter try.
+                        self._cond.notify()
+                    raise
+                # One critical section, so the connection is always counted (opening or in use).
+                with self._cond:
+                    self._opening -= 1
+                    self._created += 1
+                    self._in_use[id(pc.conn)] = pc
+            elif pc.conn.closed or self._expired(pc):
+                self._close(pc, recycled=not pc.conn.closed)
+                continue
+            elif not self._is_healthy(pc):
+                self._close(pc, recycled=False)
+                with self._cond:
+                    self._health_failures += 1
+                continue
+
+            with self._cond:
+                self._checkouts += 1
+                if waited:
+                    self._wait_time_total_s += time.monotonic() - started
+            return pc
+
+    def checkin(self, pc: _PooledConn, *, broken: bool = False) -> None:
+        if not broken and not pc.conn.closed:
+            # Never hand out a connection with a transaction left open (e.g. a failed
+            # named-cursor stream) or with autocommit switched off.
+            try:
+                if pc.conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    pc.conn.rollback()
+                if not pc.conn.autocommit:
+                    pc.conn.autocommit = True
+            except Exception:
+                broken = True
+        pc.last_used_at = time.monotonic()
+        if broken or pc.conn.closed or self._expired(pc):
+            self._close(pc, recycled=not broken and not pc.conn.closed)
+            return
+        with self._cond:
+            self._in_use.pop(id(pc.conn), None)
+            self._idle.append(pc)
+            self._cond.notify()
+
+    def _close(self, pc: _PooledConn, *, recycled: bool) -> None:
+        try:
+            pc.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._in_use.pop(id(pc.conn), None)
+            if recycled:
+                self._recycled += 1
+            self._cond.notify()
+
+    def prefill(self) -> None:
+        while True:
+            with self._cond:
+                if len(self._idle) + len(self._in_use) + self._opening >= self._min_size:
+                    return
+                self._opening += 1
+            try:
+                pc = self._open()
+            except BaseException:
+                with self._cond:
+                    self._opening -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._opening -= 1
+                self._created += 1
+                self._idle.append(pc)
+                self._cond.notify()
+
+    def pooled(self, conn) -> Optional[_PooledConn]:
+        """
+        The checked-out pool entry for conn (prepared-statement bookkeeping), or None if
+        conn is not a connection this pool has handed out.
+        """
+        with self._cond:
+            return self._in_use.get(id(conn))
+
+    def count_prepare(self) -> None:
+        with self._cond:
+            self._prepares += 1
+
+    def count_execute(self) -> None:
+        with self._cond:
+            self._executes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self._min_size,
+                "max_size": self._max_size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total_ms": round(self._wait_time_total_s * 1000.0, 3),
+                "created": self._created,
+                "recycled": self._recycled,
+                "health_failures": self._health_failures,
+                "prepared_statements_created": self._prepares,
+                "prepared_statements_executed": self._executes,
+            }
+
+
+_pool: Optional[ReadOnlyPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ReadOnlyPool:
+    """
+    Process-wide pool from env: DOCMOST_DB_POOL_MIN (1), DOCMOST_DB_POOL_MAX (10),
+    DOCMOST_DB_POOL_TIMEOUT_S (10), DOCMOST_DB_POOL_MAX_LIFETIME_S (1800, 0 = never),
+    DOCMOST_DB_POOL_HEALTH_CHECK_IDLE_S (30, -1 = never ping).
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = ReadOnlyPool(
+                connect_kwargs={
+                    "host": os.getenv("DOCMOST_DB_HOST", "db"),
+                    "port": int(os.getenv("DOCMOST_DB_PORT", "5432")),
+                    "dbname": os.getenv("DOCMOST_DB_NAME", "docmost"),
+                    "user": os.getenv("DOCMOST_DB_USER", "docmost"),
+                    "password": os.getenv("DOCMOST_DB_PASSWORD", "STRONG_DB_PASSWORD"),
+                },
+                min_size=int(os.getenv("DOCMOST_DB_POOL_MIN", "1")),
+                max_size=int(os.getenv("DOCMOST_DB_POOL_MAX", "10")),
+                timeout_s=float(os.getenv("DOCMOST_DB_POOL_TIMEOUT_S", "10")),
+                max_lifetime_s=float(os.getenv("DOCMOST_DB_POOL_MAX_LIFETIME_S", "1800")),
+                health_check_idle_s=float(os.getenv("DOCMOST_DB_POOL_HEALTH_CHECK_IDLE_S", "30")),
+            )
+            pool.prefill()
+            _pool = pool
+    return _pool
+
+
+@contextmanager
+def pooled_conn() -> Iterator[Any]:
+    """
+    Borrow a read-only connection; it goes back to the pool on exit (closed if it broke).
+    """
+    pool = get_pool()
+    pc = pool.checkout()
+    broken = False
+    try:
+        yield pc.conn
+    except psycopg2.OperationalError:
+        broken = True
+        raise
+    finally:
+        pool.checkin(pc, broken=broken or bool(pc.conn.closed))
+
+
+class Statement:
+    """
+    A fixed SELECT that is PREPAREd once per connection and then EXECUTEd by name.
+    sql uses $1..$n; arg_casts gives the SQL type for each argument (e.g. "uuid[]").
+    """
+
+    def __init__(self, name: str, sql: str, arg_casts: Sequence[str] = ()) -> None:
+        self.name = name
+        self.sql = sql
+        self.arg_casts = tuple(arg_casts)
+        types = f"({', '.join(self.arg_casts)})" if self.arg_casts else ""
+        self._prepare_sql = f"PREPARE {name}{types} AS {sql}"
+        args = ", ".join(f"%s::{cast}" for cast in self.arg_casts)
+        self._execute_sql = f"EXECUTE {name} ({args})" if self.arg_casts else f"EXECUTE {name}"
+        # Same query with named %(pN)s placeholders, for paths that cannot use EXECUTE
+        # (e.g. DECLARE ... CURSOR behind a named cursor); run it with bind(params).
+        # Named, because statements reuse $n and use them out of order.
+        self.plain_sql = _to_pyformat(self)
+
+    def bind(self, params: Sequence[Any]) -> Dict[str, Any]:
+        """
+        Parameters for plain_sql: params[i] is $(i + 1).
+        """
+        if len(params) != len(self.arg_casts):
+            raise ValueError(f"{self.name} takes {len(self.arg_casts)} parameters, got {len(params)}")
+        return {f"p{i}": value for i, value in enumerate(params, start=1)}
+
+
+def execute_prepared(cur, stmt: Statement, params: Sequence[Any] = ()) -> None:
+    """
+    Runs stmt on cur's connection, preparing it first if this connection has not seen it.
+    """
+    pool = get_pool()
+    pc = pool.pooled(cur.connection)
+    if pc is not None and stmt.name not in pc.prepared:
+        cur.execute(stmt._prepare_sql)
+        pc.prepared.add(stmt.name)
+        pool.count_prepare()
+    if pc is None:
+        # Not a pooled connection: run the plain statement.
+        cur.execute(stmt.plain_sql, stmt.bind(params))
+        return
+    cur.execute(stmt._execute_sql, tuple(params))
+    pool.count_execute()
+
+
+def _to_pyformat(stmt: Statement) -> str:
+    sql = stmt.sql
+    # Highest first, so $1 does not match the start of $10.
+    for i in range(len(stmt.arg_casts), 0, -1):
+        sql = sql.replace(f"${i}", f"%(p{i})s::{stmt.arg_casts[i - 1]}")
+    return sql
+
+
+def pool_stats() -> Dict[str, Any]:
+    return get_pool().stats()
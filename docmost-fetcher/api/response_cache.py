@@ -0,0 +1,121 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def make_etag(kind: str, key: str, fingerprint: Tuple[Any, ...]) -> str:
+    """
+    Strong ETag for a response derived from (kind, key) and the fingerprint of the
+    rows behind it (row count, max(updated_at)).
+    """
+    raw = "|".join([kind, key, *(str(v) for v in fingerprint)])
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+class _Entry:
+    __slots__ = ("etag", "body", "checked_at")
+
+    def __init__(self, etag: str, body: bytes, checked_at: float) -> None:
+        self.etag = etag
+        self.body = body
+        self.checked_at = checked_at
+
+
+class ResponseCache:
+    """
+    Bounded LRU of serialized responses keyed by (kind, key).
+    Within ttl_s of the last check an entry is served as-is without touching the DB;
+    after that the caller re-checks the fingerprint and either confirms the entry
+    (same ETag, body reused) or replaces it.
+    """
+
+    def __init__(self, *, ttl_s: float, max_entries: int) -> None:
+        self._ttl_s = ttl_s
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def fresh(self, kind: str, key: str) -> Optional[Tuple[str, bytes]]:
+        """
+        (etag, body) if the entry was checked less than ttl_s ago, else None.
+        """
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None or time.monotonic() - entry.checked_at >= self._ttl_s:
+                return None
+            self._entries.move_to_end((kind, key))
+            self.hits += 1
+            return entry.etag, entry.body
+
+    def confirm(self, kind: str, key: str, etag: str) -> Optional[bytes]:
+        """
+        Body of the entry if it still carries etag (and restarts its TTL), else None.
+        """
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None or entry.etag != etag:
+                return None
+            entry.checked_at = time.monotonic()
+            self._entries.move_to_end((kind, key))
+            self.revalidated += 1
+            return entry.body
+
+    def put(self, kind: str, key: str, etag: str, body: bytes) -> None:
+        with self._lock:
+            self.misses += 1
+            if self._max_entries <= 0:
+                return
+            self._entries[(kind, key)] = _Entry(etag, body, time.monotonic())
+            self._entries.move_to_end((kind, key))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def count_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "ttl_s": self._ttl_s,
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Process-wide cache from env: DOCMOST_FETCHER_RESPONSE_CACHE_TTL_S (5, 0 = always
+    re-check the fingerprint) and DOCMOST_FETCHER_RESPONSE_CACHE_MAX_ENTRIES (256, 0 = keep
+    no bodies; ETag/304 still works).
+    """
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                ttl_s=float(os.getenv("DOCMOST_FETCHER_RESPONSE_CACHE_TTL_S", "5")),
+                max_entries=int(os.getenv("DOCMOST_FETCHER_RESPONSE_CACHE_MAX_ENTRIES", "256")),
+            )
+    return _cache
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    return get_response_cache().stats()
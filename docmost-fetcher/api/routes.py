@@ -1,12 +1,21 @@
 import os
+import uuid
 
-from flask import Blueprint, request, jsonify
+from typing import Any, Callable, Optional, Tuple
+
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 import requests
 
 from db_functionality import (
-get_spaces, get_pages, get_contents, get_page, get_space, get_content
+get_spaces, get_pages, get_contents, get_page, get_space, get_content, get_contents_by_ids,
+get_page_versions, get_space_contents, stream_space_contents, get_pages_page,
+get_child_pages, get_spaces_fingerprint, get_pages_fingerprint, get_page_changes
 )
 
+from db_pool import pool_stats
+from response_cache import get_response_cache, make_etag, response_cache_stats
+from content_cache import content_cache_stats
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -36,10 +45,54 @@ else:
 # TODO; coherency between expected behavior and functional behavior.
 
 
+def _cached_json(
+    kind: str,
+    key: str,
+    fingerprint: Callable[[], Optional[Tuple[Any, ...]]],
+    build: Callable[[], Tuple[Any, int]],
+):
+    """
+    Serves a metadata listing with an ETag derived from fingerprint() (a cheap
+    count/max(updated_at) query). If-None-Match hits get a 304 without building the
+    body; bodies are kept serialized in the response cache, and within its TTL even
+    the fingerprint query is skipped. build() returns (payload, status); only 200s
+    are cached. A None fingerprint (invalid input) falls through to build().
+    """
+    cache = get_response_cache()
+
+    hit = cache.fresh(kind, key)
+    if hit is not None:
+        etag, body = hit
+    else:
+        fp = fingerprint()
+        if fp is None:
+            payload, status = build()
+            return jsonify(payload), status
+        etag = make_etag(kind, key, fp)
+        body = None
+        if not request.if_none_match.contains(etag.strip('"')):
+            body = cache.confirm(kind, key, etag)
+            if body is None:
+                payload, status = build()
+                if status != 200:
+                    return jsonify(payload), status
+                body = jsonify(payload).get_data()
+                cache.put(kind, key, etag, body)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.if_none_match.contains(etag.strip('"')):
+        cache.count_not_modified()
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype="application/json", headers=headers)
+
+
 @docmost_api.get("/")
 def http_home_list_spaces():
-    _get_all_spaces_dict = get_spaces()
-    return jsonify(_get_all_spaces_dict)
+    return _cached_json(
+        "home", "",
+        fingerprint=get_spaces_fingerprint,
+        build=lambda: (get_spaces(), 200),
+    )
 
 @docmost_api.get("/get-content")
 def http_get_content_specific():
@@ -54,28 +107,172 @@ def http_get_content_specific():
     }
     """
     page_id = request.args.get("page_id", "").strip()
-    content = get_page(page_id)
+    content = get_content(page_id)
+
+    if isinstance(content, tuple):
+        _, error = content
+        return jsonify({"ok": False, **error}), 400
+    if not content:
+        return jsonify({"ok": False, "message": "No page found"}), 404
+
+    # Flatten to the single-page blob the backend consumes: {"ok": True, "page": {...}}
+    space_id, pages = next(iter(content.items()))
+    pid, page = next(iter(pages.items()))
+    return jsonify({"ok": True, "page": {"id": pid, "space_id": space_id, **page}})
+
+
+
+@docmost_api.post("/get-content-batch")
+def http_get_content_batch():
+    """
+    Body: {"page_ids": [uuid, ...]}
+    Returns every requested page in one response (one DB query):
+    {
+        "ok": True,
+        "pages": { page_id: { ... meta data ..., space_id, text_content } },
+        "missing": [page_id, ...]
+    }
+    """
+    payload = request.get_json(silent=True) or {}
+    page_ids = payload.get("page_ids")
+    if not isinstance(page_ids, list):
+        return jsonify({"ok": False, "message": "Body must contain page_ids as a list"}), 400
+
+    ok, result = get_contents_by_ids(page_ids)
+    if not ok:
+        return jsonify({"ok": False, **result}), 400
+
+    return jsonify({"ok": True, **result})
+
+
+@docmost_api.post("/get-page-versions")
+def http_get_page_versions():
+    """
+    Body: {"page_ids": [uuid, ...]}
+    Returns only each page's version (updated_at, full precision) so callers can
+    revalidate cached bodies without downloading them:
+    {
+        "ok": True,
+        "versions": { page_id: version },
+        "missing": [page_id, ...]
+    }
+    """
+    payload = request.get_json(silent=True) or {}
+    page_ids = payload.get("page_ids")
+    if not isinstance(page_ids, list):
+        return jsonify({"ok": False, "message": "Body must contain page_ids as a list"}), 400
 
+    ok, result = get_page_versions(page_ids)
+    if not ok:
+        return jsonify({"ok": False, **result}), 400
+
+    return jsonify({"ok": True, **result})
 
 
 @docmost_api.get("/get-content-single")
 def http_get_content_single():
+    """
+    Whole space in one DB round-trip. ?include_content=0 returns page metadata only
+    (no text_content is read or normalized). ?stream=1 writes the same JSON incrementally
+    from a server-side cursor, so memory stays flat regardless of space size.
+    """
     _space_id = request.args.get("space_id", "").strip()
     if not _space_id:
         return jsonify({"message": "No space id found"}), 404
-    _get_space_dict = get_spaces(_space_id)
-    _get_pages = get_pages(_get_space_dict)
-    _get_content = get_contents(pages_by_space=_get_pages)
+
+    include_content = _flag(request.args.get("include_content"), default=True)
+
+    if _flag(request.args.get("stream"), default=False):
+        ok, result = stream_space_contents(_space_id, include_content=include_content)
+        if not ok:
+            if result.get("error") == "space_not_found":
+                return jsonify({"message": "No space found"}), 404
+            status = 400 if result.get("error") == "Invalid space_id type" else 500
+            return jsonify([False, result]), status
+        return Response(
+            stream_with_context(_stream_space_json(str(uuid.UUID(_space_id)), result)),
+            mimetype="application/json",
+        )
+
+    _get_content = get_space_contents(_space_id, include_content=include_content)
+
+    ok, result = _get_content
+    if not ok and result.get("error") == "space_not_found":
+        return jsonify({"message": "No space found"}), 404
+    if not ok:
+        status = 400 if result.get("error") == "Invalid space_id type" else 500
+        return jsonify(_get_content), status
 
     return jsonify(_get_content)
 
 
 
+def _flag(value, *, default: bool) -> bool:
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() not in ("0", "false", "no")
+
+
+def _stream_space_json(space_id: str, pages):
+    """
+    Yields the body of jsonify((True, {space_id: {page_id: page}})) piece by piece,
+    one page at a time. An error mid-stream can no longer change the status code;
+    it is logged and the body is left truncated (invalid JSON) so clients notice.
+    """
+    dumps = current_app.json.dumps
+    yield f"[true, {{{dumps(space_id)}: {{"
+    try:
+        first = True
+        for page_id, page in pages:
+            yield f"{'' if first else ', '}{dumps(page_id)}: {dumps(page)}"
+            first = False
+    except Exception:
+        logger.exception(f"Streaming space {space_id} failed mid-response")
+        return
+    finally:
+        pages.close()
+    yield "}}]\n"
+
+
+@docmost_api.get("/page-changes")
+def http_page_changes():
+    """
+    Change feed for mirrors: pages (soft-deleted included) changed after
+    ?after_changed_at=<iso>&after_id=<uuid>, oldest first, ?limit=N per call.
+    Returns {"ok": True, "pages": [...], "has_more": bool}.
+    """
+    raw_limit = request.args.get("limit", "").strip()
+    try:
+        limit = int(raw_limit) if raw_limit else None
+    except ValueError:
+        return jsonify({"ok": False, "message": "limit must be an integer"}), 400
+
+    ok, result = get_page_changes(
+        after_changed_at=request.args.get("after_changed_at", "").strip() or None,
+        after_id=request.args.get("after_id", "").strip() or None,
+        limit=limit,
+    )
+    if not ok:
+        return jsonify({"ok": False, **result}), 400
+
+    return jsonify({"ok": True, **result})
+
+
 @docmost_api.get("/health")
 def health():
     return jsonify({"ok": True})
 
 
+@docmost_api.get("/metrics")
+def metrics():
+    return jsonify({
+        "ok": True,
+        "db_pool": pool_stats(),
+        "response_cache": response_cache_stats(),
+        "content_cache": content_cache_stats(),
+    })
+
+
 @docmost_api.route(SPACES_ALL_ENDPOINT, methods=["GET"])
 def spaces():
     payload = request.get_json(silent=True) or {}
@@ -83,12 +280,64 @@ def spaces():
     if payload:
         space_id = payload.get("space_id") or None
 
-    _spaces = get_spaces(space_id)
+    def build():
+        _spaces = get_spaces(space_id)
+        if not _spaces:
+            return {"message": "No spaces found"}, 404
+        return {"ok": True, "spaces": _spaces}, 200
+
+    return _cached_json(
+        "spaces", str(space_id or ""),
+        fingerprint=lambda: get_spaces_fingerprint(space_id),
+        build=build,
+    )
+
+@docmost_api.get(f"{SPACES_ALL_ENDPOINT}/<space_id>/pages")
+def space_pages(space_id: str):
+    """
+    Keyset-paginated page metadata for one space, ordered by (created_at, id).
+    Query: ?limit=N (default DOCMOST_FETCHER_PAGES_PAGE_SIZE) and ?cursor=<next_cursor>.
+    Returns {"ok": True, "pages": [...], "next_cursor": str | None}.
+    """
+    raw_limit = request.args.get("limit", "").strip()
+    try:
+        limit = int(raw_limit) if raw_limit else None
+    except ValueError:
+        return jsonify({"ok": False, "message": "limit must be an integer"}), 400
+    cursor = request.args.get("cursor", "").strip() or None
+
+    def build():
+        ok, result = get_pages_page(space_id, limit=limit, cursor=cursor)
+        if not ok:
+            return {"ok": False, **result}, 400
+        return {"ok": True, **result}, 200
+
+    return _cached_json(
+        "pages", f"{space_id}|{limit}|{cursor or ''}",
+        fingerprint=lambda: get_pages_fingerprint(space_id),
+        build=build,
+    )
+
+@docmost_api.get(f"{SPACES_ALL_ENDPOINT}/<space_id>/children")
+def space_page_children(space_id: str):
+    """
+    Direct children of ?parent_page_id=<uuid> (root pages when omitted), each with
+    child_count, for trees that expand on demand.
+    Returns {"ok": True, "parent_page_id": ..., "pages": [...]}.
+    """
+    parent_page_id = request.args.get("parent_page_id", "").strip() or None
 
-    if not _spaces:
-        return jsonify({"message": "No spaces found"}), 404
+    def build():
+        ok, result = get_child_pages(space_id, parent_page_id)
+        if not ok:
+            return {"ok": False, **result}, 400
+        return {"ok": True, **result}, 200
 
-    return jsonify({"ok": True, "spaces": _spaces})
+    return _cached_json(
+        "children", f"{space_id}|{parent_page_id or ''}",
+        fingerprint=lambda: get_pages_fingerprint(space_id),
+        build=build,
+    )
 
 # ---------------------------------------- #
 # ------------- END OF ROUTES ------------ #
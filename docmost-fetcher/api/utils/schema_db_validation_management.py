@@ -3,8 +3,11 @@ from uuid import UUID
 import uuid
 from datetime import datetime
 from collections import deque
+from itertools import islice
+from typing import Optional
 import logging
 import os
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -12,140 +15,100 @@ logger = logging.getLogger(__name__)
 # ------ PAGES QUERY REFACTOR FUNCTIONS -------- #
 # ---------------------------------------------- #
 
+# Runs of 3+ "+" collapse to "++", runs of 2+ "\n" collapse to "\n".
+_PLUS_RUN = re.compile(r"\+{3,}")
+_NEWLINE_RUN = re.compile(r"\n{2,}")
+
+
 # This function is intended to be used by page content db query functions to reformat content -
 #  by removing extra "+" and "\n".
 def refactor_content(_text_content):
-    _last_char_list = []
-    _reformated_text = ""
-    for char in _text_content:
-        should_append = True
-        try:
-            if len(_last_char_list) >= 2:
-                if char == "+" and _last_char_list[-1] == "+" and _last_char_list[-2] == "+":
-                    should_append = False
-                elif char == "\n" and _last_char_list[-1] == "\n":
-                    should_append = False
-            if should_append:
-                _reformated_text += char
-
-            _last_char_list.append(char)
-        except IndexError as e:
-            logger.warning("Index error when refactoring text content: ", e)
-            print("IndexError: ", e)
-            continue
-        except Exception as e:
-            logger.warning(f"An Error occurred during runtime " + f"str(e)")
-            print("Other error when refactoring text content: ", e)
-            continue
-
-    return _reformated_text
+    """
+    Linear-time, regex-based; output is identical to the original char-by-char loop, which
+    dropped a "+" preceded by two "+" and a "\n" preceded by a "\n" (only from the third
+    character on, so a leading "\n\n" is kept as-is).
+    """
+    head = ""
+    if _text_content.startswith("\n\n"):
+        head = "\n"
+        _text_content = _text_content[1:]
+
+    if "+++" in _text_content:
+        _text_content = _PLUS_RUN.sub("++", _text_content)
+    if "\n\n" in _text_content:
+        _text_content = _NEWLINE_RUN.sub("\n", _text_content)
+
+    return head + _text_content
 
 
 # ------------------------------------------------------------ #
 # ------ VALIDATE FOR QUERY OUTPUT VS SCHEMAS FUNCTIONS ------ #
 # ------------------------------------------------------------ #
-def _validate_against_schema(refactored_envelope: dict, schema_sot: dict):
-    """
-    Validates that `data` matches the structural type mapping of `schema`.
-    Uses convert_schema_to_key_value_relation_list().
-    """
-
-    if not isinstance(refactored_envelope, dict):
-        return False, {"ok": False, "error": "not_a_dict"}
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
 
-    schema_rel = convert_schema_to_key_value_relation_list(schema_sot)
-    envelope_rel = convert_schema_to_key_value_relation_list(refactored_envelope)
-
-    # Depth check
-    if len(schema_rel) != len(envelope_rel):
-        logger.critical(
-            f"Schema mismatch: len({schema_rel}) != len({envelope_rel})" + " ---- Took place during _validate_against_schema()"
-        )
-        return False, {
-            "ok": False,
-            "error": "depth_mismatch",
-            "expected_depth": len(schema_rel),
-            "got_depth": len(envelope_rel),
-        }
 
-    # Per-depth type validation
-    for depth, (schema_level, data_level) in enumerate(zip(schema_rel, envelope_rel)):
+def _is_uuid_str(value) -> bool:
+    """
+    Exception-free equivalent of "uuid.UUID(value) would succeed" for the inputs we see.
+    Mirrors uuid.UUID's own normalization (urn:/uuid: prefix, braces, hyphens, 32 hex digits);
+    anything that is not a str is never a UUID, exactly as before.
+    """
+    if not isinstance(value, str) or len(value) < 32:
+        return False
+    h = value.replace("urn:", "").replace("uuid:", "").strip("{}").replace("-", "")
+    return len(h) == 32 and _HEX_DIGITS.issuperset(h)
 
-        schema_key_types = set(schema_level[0])
-        schema_value_types = set(schema_level[1])
 
-        data_key_types = set(data_level[0])
-        data_value_types = set(data_level[1])
+def _type_of(value):
+    return uuid.UUID if _is_uuid_str(value) else type(value)
 
-        if not data_key_types.issubset(schema_key_types):
-            return False, {
-                "ok": False,
-                "error": "key_type_mismatch",
-                "depth": depth,
-                "expected": list(schema_key_types),
-                "got": list(data_key_types),
-            }
 
-        if not data_value_types.issubset(schema_value_types):
-            return False, {
-                "ok": False,
-                "error": "value_type_mismatch",
-                "depth": depth,
-                "expected": list(schema_value_types),
-                "got": list(data_value_types),
-            }
+# Placeholders used by the schema files. As a key, "uuid" stands for any UUID key (space/page
+# ids) and any other string for a field name; as a value, a marker stands for its type.
+_VALUE_MARKERS = {
+    "uuid": uuid.UUID,
+    "string": str,
+    "datetime": datetime,
+    "int": int,
+    "bool": bool,
+}
 
-    return True, {"ok": True}
 
+def _schema_key_type(key):
+    return uuid.UUID if key == "uuid" else _type_of(key)
 
-def convert_schema_to_key_value_relation_list(root: dict):
 
-    def depth(d):
-        return max(depth(_v) if isinstance(_v, dict) else 0 for _v in d.values()) + 1
+def _schema_value_type(value):
+    if isinstance(value, str) and value in _VALUE_MARKERS:
+        return _VALUE_MARKERS[value]
+    return _type_of(value)
 
-    def check_if_uuid_type(_uuid: str):
-        try:
-            uuid.UUID(_uuid)
-            return True
-        except Exception:
-            return False
 
+def _relation_sets(root: dict, sample_size: int = 0, *, key_type=_type_of, value_type=_type_of):
     """
-    Returns a list where index d contains:
-      [[key types at depth d], [value types at depth d]]
-    Aggregates across all dictionaries that exist at that depth.
+    Per depth: (set of key types, set of value types), aggregated across every dict found
+    at that depth. sample_size > 0 only looks at the first N items of each dict, which
+    bounds the cost for large responses whose entries all share one shape.
     """
-
-    if not isinstance(root, dict):
-        raise TypeError("root must be a dict")
-
-    relational_list = []
+    relational = []
     q = deque([(root, 0)])
 
     while q:
         dct, __depth = q.popleft()
 
-        # Ensure relational_list has an entry for this depth
-        while len(relational_list) <= __depth:
-            relational_list.append([[], []])  # [key_types, value_types]
-
-        key_types, value_types = relational_list[__depth]
+        while len(relational) <= __depth:
+            relational.append((set(), set()))
+        key_types, value_types = relational[__depth]
 
-        for k, v in dct.items():
-            is_k_uuid = check_if_uuid_type(k)
-            is_v_uuid = check_if_uuid_type(v)
-            if is_k_uuid:
-                key_types.append(type(uuid.UUID(k)))
-            else:
-                key_types.append(type(k))
+        items = dct.items()
+        if sample_size > 0:
+            items = islice(items, sample_size)
 
-            if is_v_uuid:
-                value_types.append(type(uuid.UUID(v)))
-            else:
-                value_types.append(type(v))
+        for k, v in items:
+            key_types.add(key_type(k))
+            value_types.add(value_type(v))
 
-
-            # Optional: if you also want to traverse dicts inside lists/tuples/sets
+            # Also traverse dicts inside lists/tuples/sets
             if isinstance(v, (list, tuple, set)):
                 for item in v:
                     if isinstance(item, dict):
@@ -154,7 +117,93 @@ def convert_schema_to_key_value_relation_list(root: dict):
             elif isinstance(v, dict):
                 q.append((v, __depth + 1))
 
-    return relational_list
+    return relational
+
+
+class SchemaValidator:
+    """
+    A schema compiled once (at import) into its per-depth key/value type sets, so validating
+    a response only has to walk the response itself. Schema markers ("uuid", "string",
+    "datetime", ...) compile to the types they name; leaf values may also be None (SQL NULL).
+    """
+
+    def __init__(self, schema_sot: dict):
+        if not isinstance(schema_sot, dict):
+            raise TypeError("schema must be a dict")
+        self.relation = _relation_sets(schema_sot, key_type=_schema_key_type, value_type=_schema_value_type)
+        for _, value_types in self.relation:
+            if value_types - {dict, list, tuple, set}:
+                value_types.add(type(None))
+
+    def validate(self, refactored_envelope: dict, *, mode: str = "full", sample_size: int = 0):
+        """
+        Validates that `data` matches the structural type mapping of the schema.
+        mode: "full" walks everything, "sample" the first sample_size items per dict, "off" skips.
+        """
+        if mode == "off":
+            return True, {"ok": True, "skipped": True}
+
+        if not isinstance(refactored_envelope, dict):
+            return False, {"ok": False, "error": "not_a_dict"}
+
+        envelope_rel = _relation_sets(refactored_envelope, sample_size if mode == "sample" else 0)
+
+        # Depth check. Shallower data is fine when it ends in empty dicts (a space without
+        # pages); a wrong value type at the last level is caught by the per-depth check.
+        if len(envelope_rel) > len(self.relation):
+            logger.critical(
+                f"Schema mismatch: depth {len(self.relation)} != {len(envelope_rel)}"
+                + " ---- Took place during SchemaValidator.validate()"
+            )
+            return False, {
+                "ok": False,
+                "error": "depth_mismatch",
+                "expected_depth": len(self.relation),
+                "got_depth": len(envelope_rel),
+            }
+
+        # Per-depth type validation
+        for depth, ((schema_key_types, schema_value_types), (data_key_types, data_value_types)) in enumerate(
+            zip(self.relation, envelope_rel)
+        ):
+            if not data_key_types.issubset(schema_key_types):
+                return False, {
+                    "ok": False,
+                    "error": "key_type_mismatch",
+                    "depth": depth,
+                    "expected": list(schema_key_types),
+                    "got": list(data_key_types),
+                }
+
+            if not data_value_types.issubset(schema_value_types):
+                return False, {
+                    "ok": False,
+                    "error": "value_type_mismatch",
+                    "depth": depth,
+                    "expected": list(schema_value_types),
+                    "got": list(data_value_types),
+                }
+
+        return True, {"ok": True}
+
+
+def _validate_against_schema(refactored_envelope: dict, schema_sot: dict):
+    """
+    One-off validation against an uncompiled schema; hot paths use COMPILED_SCHEMAS.
+    """
+    return SchemaValidator(schema_sot).validate(refactored_envelope)
+
+
+def convert_schema_to_key_value_relation_list(root: dict):
+    """
+    Returns a list where index d contains:
+      [[key types at depth d], [value types at depth d]]
+    Aggregates across all dictionaries that exist at that depth.
+    """
+    if not isinstance(root, dict):
+        raise TypeError("root must be a dict")
+
+    return [[list(keys), list(values)] for keys, values in _relation_sets(root)]
 
 # MODE
 MODE = os.getenv("MODE", "dev")
@@ -182,18 +231,18 @@ SINGLE_PAGE_SCHEMA_FILE_PATH = SCHEMA_BASE_PATH + _SINGLE_PAGE_SCHEMA_FILE_NAME
 SINGLE_SPACE_SCHEMA_FILE_PATH = SCHEMA_BASE_PATH + _SINGLE_SPACE_SCHEMA_FILE_NAME
 
 # DICTS FROM SCHEMA FILES
-SINGLE_PAGE_CONTENT_SCHEMA_DICT = {}
-SINGLE_PAGE_SCHEMA_DICT = {}
-SINGLE_SPACE_SCHEMA_DICT = {}
+def _load_schema(path: str) -> dict:
+    with open(path, "r") as f:
+        raw = f.read()
+    if not raw.strip():
+        logger.warning(f"Schema file {path} is empty")
+        return {}
+    return json.loads(raw)
 
-for file in (SINGLE_PAGE_SCHEMA_FILE_PATH, SINGLE_PAGE_CONTENT_SCHEMA_FILE_PATH, SINGLE_SPACE_SCHEMA_FILE_PATH):
-    with open(file, "r") as f:
-        if _SINGLE_PAGE_CONTENT_SCHEMA_FILE_NAME in file:
-            SINGLE_PAGE_CONTENT_SCHEMA_DICT = json.load(f)
-        elif _SINGLE_PAGE_SCHEMA_FILE_NAME in file:
-            _SINGLE_PAGE_SCHEMA_FILE_NAME = json.load(f)
-        elif _SINGLE_SPACE_SCHEMA_FILE_NAME in file:
-            SINGLE_SPACE_SCHEMA_DICT = json.load(f)
+
+SINGLE_PAGE_CONTENT_SCHEMA_DICT = _load_schema(SINGLE_PAGE_CONTENT_SCHEMA_FILE_PATH)
+SINGLE_PAGE_SCHEMA_DICT = _load_schema(SINGLE_PAGE_SCHEMA_FILE_PATH)
+SINGLE_SPACE_SCHEMA_DICT = _load_schema(SINGLE_SPACE_SCHEMA_FILE_PATH)
 
 
 SCHEMAS = {
@@ -214,11 +263,24 @@ allowed_types = (
     "space_multi",
 )
 
+# Compiled once at import; validate_dict never re-derives a schema's type map.
+COMPILED_SCHEMAS = {
+    schema_type: SchemaValidator(schema)
+    for schema_type, schema in SCHEMAS.items()
+    if isinstance(schema, dict)
+}
+
+# VALIDATION MODE: "full" (default), "sample" (first SCHEMA_VALIDATION_SAMPLE_SIZE items of
+#  every dict) or "off". Callers on hot endpoints can pass their own mode to validate_dict.
+SCHEMA_VALIDATION_MODE = os.getenv("SCHEMA_VALIDATION_MODE", "full").strip().lower()
+SCHEMA_VALIDATION_SAMPLE_SIZE = int(os.getenv("SCHEMA_VALIDATION_SAMPLE_SIZE", "20"))
+validation_modes = ("full", "sample", "off")
+
 # ---------------------------------------------------------------------------------- #
 # ------ EXPOSED FUNCTION TO BE USED TO VERIFY DICT BEFORE RETURNING RESPONSE ------ #
 # ---------------------------------------------------------------------------------- #
 
-def validate_dict(schema_to_check: dict, schema_type: str):
+def validate_dict(schema_to_check: dict, schema_type: str, mode: Optional[str] = None):
     if schema_type not in allowed_types:
         logger.warning(f"Invalid schema type {schema_type}")
         return False, {
@@ -227,8 +289,13 @@ def validate_dict(schema_to_check: dict, schema_type: str):
             "allowed": list(allowed_types),
         }
 
-    schema = SCHEMAS.get(schema_type)
-    if not isinstance(schema, dict):
+    mode = (mode or SCHEMA_VALIDATION_MODE)
+    if mode not in validation_modes:
+        logger.warning(f"Invalid validation mode {mode}, using full")
+        mode = "full"
+
+    validator = COMPILED_SCHEMAS.get(schema_type)
+    if validator is None:
         logger.critical(f"Schema missing or invalid for type={schema_type}")
         return False, {
             "ok": False,
@@ -236,4 +303,4 @@ def validate_dict(schema_to_check: dict, schema_type: str):
             "value": schema_type,
         }
 
-    return _validate_against_schema(schema_to_check, schema)
\ No newline at end of file
+    return validator.validate(schema_to_check, mode=mode, sample_size=SCHEMA_VALIDATION_SAMPLE_SIZE)
\ No newline at end of file
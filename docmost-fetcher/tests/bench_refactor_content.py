@@ -0,0 +1,60 @@
+"""
+Micro-benchmark: refactor_content vs the legacy char-by-char version across page sizes.
+
+    python docmost-fetcher/tests/bench_refactor_content.py [--skip-legacy-above BYTES]
+
+Not collected by pytest (no test_ prefix).
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest  # noqa: E402,F401  (puts api/ on sys.path, sets schema env)
+
+from legacy_refactor import legacy_refactor_content  # noqa: E402
+from utils.schema_db_validation_management import refactor_content  # noqa: E402
+
+SIZES = (("1 KB", 1024), ("100 KB", 100 * 1024), ("5 MB", 5 * 1024 * 1024))
+
+
+def _page(size: int, seed: int = 0) -> str:
+    # Mostly prose with the separator runs Docmost exports contain.
+    rng = random.Random(seed)
+    parts = ["lorem ipsum dolor sit amet ", "\n", "\n\n\n", "+++++", "| cell ", "++"]
+    weights = [70, 10, 5, 3, 10, 2]
+    out, n = [], 0
+    while n < size:
+        part = rng.choices(parts, weights)[0]
+        out.append(part)
+        n += len(part)
+    return "".join(out)[:size]
+
+
+def _best(fn, text: str) -> float:
+    number = max(1, int(1_000_000 / max(1, len(text))))
+    return min(timeit.repeat(lambda: fn(text), number=number, repeat=3)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skip-legacy-above", type=int, default=0,
+                        help="skip the legacy version for pages larger than this many bytes (0 = never)")
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'regex':>12} {'legacy':>12} {'speedup':>8}")
+    for label, size in SIZES:
+        text = _page(size)
+        new = _best(refactor_content, text)
+        if args.skip_legacy_above and size > args.skip_legacy_above:
+            print(f"{label:>8} {new * 1e3:>10.3f}ms {'-':>12} {'-':>8}")
+            continue
+        assert refactor_content(text) == legacy_refactor_content(text)
+        old = _best(legacy_refactor_content, text)
+        print(f"{label:>8} {new * 1e3:>10.3f}ms {old * 1e3:>10.3f}ms {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
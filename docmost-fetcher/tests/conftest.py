@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The fetcher runs from docmost-fetcher/api with flat imports; tests import it the same way.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(os.path.dirname(_HERE))
+
+sys.path.insert(0, os.path.join(os.path.dirname(_HERE), "api"))
+os.environ.setdefault("MODE", "prod")
+os.environ.setdefault("SCHEMA_BASE_PATH", os.path.join(_ROOT, "schemas", "docmost_db_schemas") + os.sep)
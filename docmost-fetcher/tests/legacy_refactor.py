@@ -0,0 +1,20 @@
+def legacy_refactor_content(_text_content):
+    """
+    The char-by-char refactor_content that shipped before the regex version, kept as the
+    reference its replacement must match (logging/print of impossible errors dropped).
+    """
+    _last_char_list = []
+    _reformated_text = ""
+    for char in _text_content:
+        should_append = True
+        if len(_last_char_list) >= 2:
+            if char == "+" and _last_char_list[-1] == "+" and _last_char_list[-2] == "+":
+                should_append = False
+            elif char == "\n" and _last_char_list[-1] == "\n":
+                should_append = False
+        if should_append:
+            _reformated_text += char
+
+        _last_char_list.append(char)
+
+    return _reformated_text
@@ -0,0 +1,42 @@
+import itertools
+import random
+
+import pytest
+
+from legacy_refactor import legacy_refactor_content
+from utils.schema_db_validation_management import refactor_content
+
+
+def test_matches_legacy_on_every_short_string():
+    for n in range(9):
+        for chars in itertools.product("+\na", repeat=n):
+            text = "".join(chars)
+            assert refactor_content(text) == legacy_refactor_content(text), repr(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_legacy_on_random_text(seed):
+    rng = random.Random(seed)
+    alphabet = ["+", "\n", "a", " ", "++", "\n\n", "+++", "é", "\r\n"]
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 400)))
+        assert refactor_content(text) == legacy_refactor_content(text), repr(text)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("", ""),
+        ("\n\n", "\n\n"),
+        ("\n\n\n", "\n\n"),
+        ("\n\nabc", "\n\nabc"),
+        ("\n\n\n\nabc\n\n\nd", "\n\nabc\nd"),
+        ("a+++b", "a++b"),
+        ("++++++", "++"),
+        ("+++\n\n+++", "++\n++"),
+        ("a\n\nb", "a\nb"),
+    ],
+)
+def test_known_cases(text, expected):
+    assert refactor_content(text) == expected
+    assert legacy_refactor_content(text) == expected
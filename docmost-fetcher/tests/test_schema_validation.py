@@ -0,0 +1,69 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.schema_db_validation_management import validate_dict
+
+
+def _page(*, parent=None, text="body"):
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    return {
+        "title": "Runbook",
+        "parent_page_id": parent,
+        "creator_id": str(uuid.uuid4()),
+        "space_id": str(uuid.uuid4()),
+        "created_at": now,
+        "updated_at": now,
+        "text_content": text,
+        "content_updated_at": now,
+        "version": now.isoformat(),
+    }
+
+
+def _payload(*, uuid_objects=False):
+    sid, root, child = (uuid.uuid4() for _ in range(3))
+    key = (lambda u: u) if uuid_objects else str
+    return {
+        key(sid): {
+            key(root): _page(),
+            key(child): _page(parent=root if uuid_objects else str(root), text=None),
+        }
+    }
+
+
+@pytest.mark.parametrize("mode", ["full", "sample"])
+@pytest.mark.parametrize("uuid_objects", [False, True])
+def test_content_multi_accepts_real_shaped_payload(mode, uuid_objects):
+    ok, info = validate_dict(_payload(uuid_objects=uuid_objects), "content_multi", mode=mode)
+    assert ok is True, info
+
+
+def test_content_multi_accepts_space_without_pages():
+    ok, info = validate_dict({str(uuid.uuid4()): {}}, "content_multi", mode="full")
+    assert ok is True, info
+
+
+def test_content_multi_rejects_non_uuid_space_key():
+    payload = _payload()
+    payload["not-a-uuid"] = payload.pop(next(iter(payload)))
+    ok, info = validate_dict(payload, "content_multi", mode="full")
+    assert ok is False
+    assert info["error"] == "key_type_mismatch" and info["depth"] == 0
+
+
+def test_content_multi_rejects_wrong_value_type():
+    payload = _payload()
+    page = next(iter(next(iter(payload.values())).values()))
+    page["title"] = 42
+    ok, info = validate_dict(payload, "content_multi", mode="full")
+    assert ok is False
+    assert info["error"] == "value_type_mismatch" and info["depth"] == 2
+
+
+def test_content_multi_rejects_extra_nesting():
+    payload = _payload()
+    page = next(iter(next(iter(payload.values())).values()))
+    page["title"] = {"nested": "dict"}
+    ok, info = validate_dict(payload, "content_multi", mode="full")
+    assert ok is False
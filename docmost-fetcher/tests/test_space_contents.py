@@ -0,0 +1,165 @@
+import json
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+import db_functionality
+
+
+class _Cursor:
+    itersize = 0
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def execute(self, sql, params):
+        pass
+
+    def fetchone(self):
+        # Only the SPACE_BY_ID existence check uses fetchone.
+        return {"id": self._rows[0]["space_id"]} if self._rows else None
+
+
+class _Conn:
+    autocommit = True
+    closed = False
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def cursor(self, **kwargs):
+        return _Cursor(self._rows)
+
+    def rollback(self):
+        pass
+
+
+def _rows(space_id, n):
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    root = str(uuid.uuid4())
+    rows = []
+    for i in range(n):
+        page_id = root if i == 0 else str(uuid.uuid4())
+        rows.append({
+            "space_id": space_id,
+            "id": page_id,
+            "title": f"Page {i}",
+            "parent_page_id": None if i == 0 else root,
+            "creator_id": str(uuid.uuid4()),
+            "created_at": now,
+            "updated_at": now,
+            "text_content": "a\n\n\nb+++" if i % 2 else None,
+        })
+    return rows
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    def install(rows):
+        @contextmanager
+        def conn():
+            yield _Conn(rows)
+
+        monkeypatch.setattr(db_functionality, "_conn", conn)
+        monkeypatch.setattr(db_functionality, "execute_prepared", lambda cur, stmt, params: None)
+
+    return install
+
+
+@pytest.mark.parametrize("mode", ["full", "sample"])
+@pytest.mark.parametrize("include_content", [True, False])
+def test_get_space_contents_validates_real_rows(fake_db, monkeypatch, mode, include_content):
+    space_id = str(uuid.uuid4())
+    fake_db(_rows(space_id, 30))
+    monkeypatch.setattr(db_functionality, "HOT_VALIDATION_MODE", mode)
+
+    ok, out = db_functionality.get_space_contents(space_id, include_content=include_content)
+
+    assert ok is True, out
+    assert len(out[space_id]) == 30
+
+
+def test_get_space_contents_error_reports_path_not_payload(fake_db):
+    space_id = str(uuid.uuid4())
+    rows = _rows(space_id, 3)
+    rows[1]["title"] = 42
+    fake_db(rows)
+
+    ok, out = db_functionality.get_space_contents(space_id)
+
+    assert ok is False
+    assert out["value"]["error"] == "value_type_mismatch"
+    assert out["value"]["depth"] == 2
+    assert "Page 0" not in json.dumps(out)
+
+
+def _streamed(space_id):
+    ok, pages = db_functionality.stream_space_contents(space_id)
+    return ok, (dict(pages) if ok else pages)
+
+
+@pytest.mark.parametrize("mode", ["full", "sample"])
+def test_stream_validates_like_non_stream(fake_db, monkeypatch, mode):
+    space_id = str(uuid.uuid4())
+    fake_db(_rows(space_id, 50))
+    monkeypatch.setattr(db_functionality, "HOT_VALIDATION_MODE", mode)
+
+    ok, pages = _streamed(space_id)
+    assert ok is True, pages
+    assert pages == db_functionality.get_space_contents(space_id)[1][space_id]
+
+
+def test_stream_rejects_invalid_sample_before_streaming(fake_db):
+    space_id = str(uuid.uuid4())
+    rows = _rows(space_id, 5)
+    rows[2]["title"] = 42
+    fake_db(rows)
+
+    ok, out = _streamed(space_id)
+    assert ok is False
+    assert out["value"]["error"] == "value_type_mismatch"
+
+
+def test_stream_full_mode_checks_rows_after_sample(fake_db, monkeypatch):
+    space_id = str(uuid.uuid4())
+    rows = _rows(space_id, db_functionality.SCHEMA_VALIDATION_SAMPLE_SIZE + 5)
+    rows[-1]["title"] = 42
+    fake_db(rows)
+    monkeypatch.setattr(db_functionality, "HOT_VALIDATION_MODE", "full")
+
+    ok, pages = db_functionality.stream_space_contents(space_id)
+    assert ok is True
+    with pytest.raises(ValueError):
+        list(pages)
+
+
+def test_stream_unknown_space(fake_db):
+    fake_db([])
+    ok, out = _streamed(str(uuid.uuid4()))
+    assert ok is False and out["error"] == "space_not_found"
+
+
+def test_plain_sql_binds_reused_and_out_of_order_parameters():
+    stmt = db_functionality.PAGE_CHANGES_AFTER
+    bound = stmt.plain_sql % {k: repr(v) for k, v in stmt.bind((10, "2024-01-01", "id-x")).items()}
+    assert "updated_at >= '2024-01-01'::timestamptz OR deleted_at >= '2024-01-01'::timestamptz" in bound
+    assert "> ('2024-01-01'::timestamptz, 'id-x'::uuid)" in bound
+    assert "LIMIT 10::int" in bound
+
+    stmt = db_functionality.PAGES_BY_SPACE_AFTER
+    bound = stmt.plain_sql % {k: repr(v) for k, v in stmt.bind(("sid", 5, "ts", "pid")).items()}
+    assert "('ts'::timestamptz, 'pid'::uuid)" in bound
+    assert "LIMIT 5::int" in bound
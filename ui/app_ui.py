@@ -1,8 +1,13 @@
 import os
-from typing import Any, Dict
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 
 BACKEND_URL = os.getenv("BACKEND_BASE_URL", "http://backend:8100")
 DOCMOST_FETCHER_EXTERNAL_BASE_URL = os.getenv("DOCMOST_FETCHER_EXTERNAL_BASE_URL", "http://docmost:8099")
@@ -13,6 +18,123 @@ UI_LISTEN_PORT = int(os.getenv("UI_LISTEN_PORT", "8090"))
 from logging_config import setup_logging
 setup_logging(_service="ui")
 
+# One keep-alive session for all upstream calls; GETs are retried with backoff.
+UPSTREAM_TIMEOUT = (
+    float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5")),
+    float(os.getenv("UI_UPSTREAM_READ_TIMEOUT_S", "30")),
+)
+upstream = requests.Session()
+_upstream_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "32")),
+    max_retries=Retry(
+        total=int(os.getenv("HTTP_RETRY_TOTAL", "3")),
+        backoff_factor=float(os.getenv("HTTP_RETRY_BACKOFF_S", "0.3")),
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        raise_on_status=False,
+    ),
+)
+upstream.mount("http://", _upstream_adapter)
+upstream.mount("https://", _upstream_adapter)
+
+# Fetcher GETs are proxied as raw bytes. Identical concurrent requests share one upstream
+# call, and successful bodies are kept for UI_PROXY_CACHE_TTL_S (0 disables the cache).
+PROXY_CACHE_TTL_S = float(os.getenv("UI_PROXY_CACHE_TTL_S", "2"))
+PROXY_CACHE_MAX_ENTRIES = int(os.getenv("UI_PROXY_CACHE_MAX_ENTRIES", "256"))
+PROXY_CACHE_MAX_BODY_BYTES = int(os.getenv("UI_PROXY_CACHE_MAX_BODY_BYTES", str(4 * 1024 * 1024)))
+# A follower never waits longer than the leader's own request can take (all retries included).
+PROXY_COALESCE_WAIT_S = sum(UPSTREAM_TIMEOUT) * (int(os.getenv("HTTP_RETRY_TOTAL", "3")) + 1)
+
+# Upstream response headers passed back to the browser unchanged.
+_PASS_HEADERS = ("Content-Type", "ETag", "Cache-Control", "Last-Modified")
+
+
+class _Upstream(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[_Upstream] = None
+        self.error: Optional[BaseException] = None
+
+
+_proxy_lock = threading.Lock()
+_proxy_cache: "OrderedDict[Tuple[Any, ...], Tuple[float, _Upstream]]" = OrderedDict()
+_proxy_inflight: Dict[Tuple[Any, ...], _Flight] = {}
+
+
+def _fetch_upstream(url: str, params: Dict[str, str]) -> _Upstream:
+    r = upstream.get(url, params=params, timeout=UPSTREAM_TIMEOUT)
+    headers = {h: r.headers[h] for h in _PASS_HEADERS if h in r.headers}
+    return _Upstream(r.status_code, headers, r.content)
+
+
+def _shared_get(url: str, params: Dict[str, str]) -> _Upstream:
+    """
+    Upstream GET with micro-cache and request coalescing: the first caller for a key
+    does the request, concurrent callers for the same key wait for its result.
+    """
+    key = (url, tuple(sorted(params.items())))
+    with _proxy_lock:
+        hit = _proxy_cache.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            _proxy_cache.move_to_end(key)
+            return hit[1]
+        flight = _proxy_inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            _proxy_inflight[key] = flight
+
+    if not leader:
+        if not flight.done.wait(PROXY_COALESCE_WAIT_S):
+            raise requests.Timeout(f"Timed out waiting for shared upstream request to {url}")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = _fetch_upstream(url, params)
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _proxy_lock:
+            _proxy_inflight.pop(key, None)
+            res = flight.result
+            if (
+                res is not None
+                and res.status == 200
+                and PROXY_CACHE_TTL_S > 0
+                and len(res.body) <= PROXY_CACHE_MAX_BODY_BYTES
+            ):
+                _proxy_cache[key] = (time.monotonic() + PROXY_CACHE_TTL_S, res)
+                _proxy_cache.move_to_end(key)
+                while len(_proxy_cache) > PROXY_CACHE_MAX_ENTRIES:
+                    _proxy_cache.popitem(last=False)
+        flight.done.set()
+
+
+def _proxy_get(url: str, params: Optional[Dict[str, str]] = None):
+    try:
+        res = _shared_get(url, params or {})
+    except requests.RequestException:
+        app.logger.warning(f"Upstream GET {url} failed", exc_info=True)
+        return jsonify({"ok": False, "message": "upstream unavailable"}), 502
+
+    etag = res.headers.get("ETag")
+    if res.status == 200 and etag and request.if_none_match.contains(etag.strip('"')):
+        return Response(status=304, headers={h: v for h, v in res.headers.items() if h != "Content-Type"})
+    return Response(res.body, status=res.status, headers=res.headers)
+
 
 app = Flask(__name__, static_folder="static", static_url_path="/static")
 
@@ -45,9 +167,13 @@ def api_chat():
 
 @app.get("/docmost/api")
 def api_spaces():
-    all_spaces = requests.get(docmost_fetcher_spaces_endpoint).json()
+    return _proxy_get(docmost_fetcher_spaces_endpoint)
+
 
-    return jsonify(all_spaces)
+@app.get("/docmost/api/<space_id>/children")
+def api_space_page_children(space_id: str):
+    params = {k: v for k, v in request.args.items() if k == "parent_page_id"}
+    return _proxy_get(f"{docmost_fetcher_spaces_endpoint}/{space_id}/children", params)
 
 
 if __name__ == "__main__":
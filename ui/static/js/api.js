@@ -5,10 +5,12 @@ export async function fetchSpaces(){
   return data.spaces || [];
 }
 
-export async function fetchPages(spaceId){
-  const r = await fetch(`/docmost/api/${encodeURIComponent(spaceId)}/pages`);
+// Direct children of parentId (root pages when parentId is null), each with child_count.
+export async function fetchChildren(spaceId, parentId = null){
+  const qs = parentId ? `?${new URLSearchParams({ parent_page_id: parentId })}` : '';
+  const r = await fetch(`/docmost/api/${encodeURIComponent(spaceId)}/children${qs}`);
   const data = await r.json();
-  if (!data.ok) throw new Error('pages failed');
+  if (!data.ok) throw new Error('children failed');
   return data.pages || [];
 }
 
@@ -1,6 +1,6 @@
-import { fetchSpaces, fetchPages } from './api.js';
+import { fetchSpaces, fetchChildren } from './api.js';
 import { state, setSpace, clearSelection } from './state.js';
-import { buildTree, renderTree } from './tree.js';
+import { renderTree, setChildLoader, setRootPages } from './tree.js';
 import { addChat, sendChat } from './chat.js';
 
 const elSpaces = document.getElementById('spaces');
@@ -37,6 +37,22 @@ async function loadSpacesUI(){
   }
 }
 
+// Bumped per space selection so a slower, older root listing cannot overwrite a newer one.
+let pagesLoadId = 0;
+
+// Only root pages are loaded up front; deeper levels are fetched when a node is expanded.
+async function loadPagesUI(space){
+  const loadId = ++pagesLoadId;
+  elTree.innerHTML = '';
+  setChildLoader((parentId) => fetchChildren(space.id, parentId));
+
+  const roots = await fetchChildren(space.id, null);
+  if (loadId !== pagesLoadId) return;
+
+  setRootPages(roots);
+  renderTree(elTree, setStateUI);
+}
+
 async function selectSpace(space){
   setSpace(space);
   setStateUI();
@@ -45,9 +61,7 @@ async function selectSpace(space){
   elChat.innerHTML = '';
   addChat(elChat, 'system', `Space selected: ${space.name || '(unnamed)'} (${space.id})`);
 
-  const pages = await fetchPages(space.id);
-  buildTree(pages);
-  renderTree(elTree, setStateUI);
+  await loadPagesUI(space);
 
   setStateUI();
 }
@@ -3,6 +3,7 @@ export const state = {
   pagesById: new Map(),       // id -> page {children:[]}
   rootIds: [],                // top-level page ids
   selected: new Map(),        // page_id -> {space_id,page_id,title,slug_id}
+  expanded: new Set(),        // page ids whose children are shown (survives re-renders)
 };
 
 export function clearSelection(){
@@ -11,5 +12,6 @@ export function clearSelection(){
 
 export function setSpace(space){
   state.currentSpace = space;
+  state.expanded.clear();
   clearSelection();
 }
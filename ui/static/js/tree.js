@@ -1,130 +1,200 @@
 import { esc, isInteractiveTarget } from './util.js';
 import { state } from './state.js';
 
-export function buildTree(pages){
+// The tree is virtualized: only rows inside the scroll viewport exist in the DOM.
+// Rows have a fixed height (keep in sync with .vnode in app.css), so row i sits at i * ROW_HEIGHT.
+const ROW_HEIGHT = 34;
+const INDENT_PX = 22;
+const OVERSCAN_ROWS = 10;
+
+// Lazy trees: pages arrive one level at a time. children === null means "not loaded yet";
+// child_count (from the fetcher) says whether there is anything to load.
+// Each level comes already sorted by the fetcher (lower(title), id) and is kept in that order.
+let childLoader = null;
+const loading = new Set();
+
+export function setChildLoader(fn){
+  childLoader = fn;
+}
+
+function toNode(p){
+  return { ...p, children: (p.child_count || 0) > 0 ? null : [] };
+}
+
+export function setRootPages(pages){
   state.pagesById = new Map();
   state.rootIds = [];
-
+  loading.clear();
   for (const p of pages){
-    state.pagesById.set(p.id, { ...p, children: [] });
+    state.pagesById.set(p.id, toNode(p));
+    state.rootIds.push(p.id);
   }
+}
 
-  for (const p of state.pagesById.values()){
-    const parentId = p.parent_page_id;
-    if (!parentId){ state.rootIds.push(p.id); continue; }
-    const parent = state.pagesById.get(parentId);
-    if (!parent){ state.rootIds.push(p.id); continue; }
+export function setChildPages(parentId, pages){
+  const parent = state.pagesById.get(parentId);
+  if (!parent) return;
+  parent.children = [];
+  for (const p of pages){
+    if (!state.pagesById.has(p.id)) state.pagesById.set(p.id, toNode(p));
     parent.children.push(p.id);
   }
-
-  for (const p of state.pagesById.values()){
-    p.children.sort((a,b)=>{
-      const pa = state.pagesById.get(a), pb = state.pagesById.get(b);
-      const ta = (pa?.title || '').toLowerCase();
-      const tb = (pb?.title || '').toLowerCase();
-      if (ta < tb) return -1;
-      if (ta > tb) return 1;
-      return (pa?.id || '').localeCompare(pb?.id || '');
-    });
-  }
-
-  state.rootIds.sort((a,b)=>{
-    const pa = state.pagesById.get(a), pb = state.pagesById.get(b);
-    const ta = (pa?.title || '').toLowerCase();
-    const tb = (pb?.title || '').toLowerCase();
-    if (ta < tb) return -1;
-    if (ta > tb) return 1;
-    return (pa?.id || '').localeCompare(pb?.id || '');
-  });
 }
 
-function setExpanded(childrenEl, toggleEl, expanded){
-  childrenEl.classList.toggle('hidden', !expanded);
-  toggleEl.textContent = expanded ? '-' : '+';
-  toggleEl.dataset.expanded = expanded ? '1' : '0';
+function hasChildren(p){
+  return p.children ? p.children.length > 0 : (p.child_count || 0) > 0;
 }
 
-function toggleExpanded(childrenEl, toggleEl){
-  const expanded = toggleEl.dataset.expanded === '1';
-  setExpanded(childrenEl, toggleEl, !expanded);
-}
+// ---------- virtual view ----------
 
-export function renderTree(elTree, onSelectionChanged){
-  elTree.innerHTML = '';
-  for (const id of state.rootIds){
-    elTree.appendChild(renderNode(id, onSelectionChanged));
+let view = null;   // { elTree, spacer, onSelectionChanged, rows: [{id, depth}], frame }
+const wired = new WeakSet();
+
+// Visible rows in display order: roots, plus the loaded children of every expanded node.
+function flatten(){
+  const rows = [];
+  const stack = [];
+  for (let i = state.rootIds.length - 1; i >= 0; i--) stack.push({ id: state.rootIds[i], depth: 0 });
+
+  while (stack.length){
+    const row = stack.pop();
+    const p = state.pagesById.get(row.id);
+    if (!p) continue;
+    rows.push(row);
+    if (state.expanded.has(p.id) && p.children){
+      for (let i = p.children.length - 1; i >= 0; i--) stack.push({ id: p.children[i], depth: row.depth + 1 });
+    }
   }
+  return rows;
 }
 
-function renderNode(id, onSelectionChanged){
-  const p = state.pagesById.get(id);
+function renderRow(row, index){
+  const p = state.pagesById.get(row.id);
+  const expandable = hasChildren(p);
+  const expanded = state.expanded.has(p.id) && !!p.children;
 
-  const wrap = document.createElement('div');
-  const row = document.createElement('div');
-  row.className = 'node';
+  let mark = '•';
+  if (loading.has(p.id)) mark = '…';
+  else if (expandable) mark = expanded ? '-' : '+';
 
-  const hasChildren = (p.children && p.children.length > 0);
+  // Title only (no slug/id line). Tooltip shows full title.
+  const titleText = (p.title || '(untitled)');
 
-  const toggle = document.createElement('div');
-  toggle.className = 'toggle' + (hasChildren ? '' : ' disabled');
-  toggle.textContent = hasChildren ? '+' : '•';
-  toggle.dataset.expanded = '0';
+  const el = document.createElement('div');
+  el.className = 'node vnode';
+  el.dataset.id = p.id;
+  el.style.transform = `translateY(${index * ROW_HEIGHT}px)`;
+  el.style.paddingLeft = `${6 + row.depth * INDENT_PX}px`;
+  el.innerHTML =
+    `<div class="toggle${expandable ? '' : ' disabled'}">${mark}</div>` +
+    `<input type="checkbox" class="checkbox"${state.selected.has(p.id) ? ' checked' : ''} />` +
+    `<div class="label"><div class="t" title="${esc(titleText)}">${esc(titleText)}</div></div>`;
+  return el;
+}
 
-  const cb = document.createElement('input');
-  cb.type = 'checkbox';
-  cb.className = 'checkbox';
-  cb.checked = state.selected.has(p.id);
+function paint(){
+  if (!view) return;
+  view.frame = 0;
 
-  const label = document.createElement('div');
-  label.className = 'label';
+  const { elTree, spacer, rows } = view;
+  const top = elTree.scrollTop;
+  const height = elTree.clientHeight || ROW_HEIGHT * 20;
+  const first = Math.max(0, Math.floor(top / ROW_HEIGHT) - OVERSCAN_ROWS);
+  const last = Math.min(rows.length, Math.ceil((top + height) / ROW_HEIGHT) + OVERSCAN_ROWS);
 
-  // Title only (no slug/id line). Tooltip shows full title.
-  const titleText = (p.title || '(untitled)');
-  label.innerHTML = `<div class="t" title="${esc(titleText)}">${esc(titleText)}</div>`;
+  const frag = document.createDocumentFragment();
+  for (let i = first; i < last; i++){
+    frag.appendChild(renderRow(rows[i], i));
+  }
+  spacer.replaceChildren(frag);
+}
+
+function schedulePaint(){
+  if (view && !view.frame) view.frame = requestAnimationFrame(paint);
+}
 
-  const children = document.createElement('div');
-  children.className = 'children hidden';
+// Re-flattens after the shape changed (expand/collapse/load); scrolling only repaints.
+function refresh(){
+  if (!view) return;
+  view.rows = flatten();
+  view.spacer.style.height = `${view.rows.length * ROW_HEIGHT}px`;
+  paint();
+}
 
-  if (hasChildren){
-    for (const cid of p.children){
-      children.appendChild(renderNode(cid, onSelectionChanged));
+async function expand(p){
+  if (!p.children){
+    if (!childLoader || loading.has(p.id)) return;
+    loading.add(p.id);
+    schedulePaint();
+    try {
+      setChildPages(p.id, await childLoader(p.id));
+    } catch (e) {
+      console.error(e);
+    } finally {
+      loading.delete(p.id);
     }
+    // The space may have changed while loading.
+    if (state.pagesById.get(p.id) !== p) return;
+    if (!p.children){ schedulePaint(); return; }
+  }
+  state.expanded.add(p.id);
+  refresh();
+}
 
-    // Clicking the plus toggles
-    toggle.onclick = (e) => {
-      e.stopPropagation();
-      toggleExpanded(children, toggle);
-    };
-
-    // Clicking anywhere on the row except checkbox toggles (same as plus)
-    row.onclick = (e) => {
-      if (isInteractiveTarget(e.target)) return;
-      toggleExpanded(children, toggle);
-    };
+function toggleExpanded(id){
+  const p = state.pagesById.get(id);
+  if (!p || !hasChildren(p)) return;
+  if (state.expanded.has(id) && p.children){
+    state.expanded.delete(id);
+    refresh();
   } else {
-    // Still allow row click to do nothing for leaf nodes.
-    row.onclick = (e) => {};
+    expand(p);
   }
+}
 
-  cb.onchange = () => {
-    if (cb.checked){
-      state.selected.set(p.id, {
-        space_id: p.space_id,
-        page_id: p.id,
-        title: p.title || '',
-        slug_id: p.slug_id || '',
-      });
-    } else {
-      state.selected.delete(p.id);
-    }
-    onSelectionChanged();
-  };
+function onTreeClick(e){
+  const rowEl = e.target.closest('.vnode');
+  if (!rowEl) return;
+  // Clicking the toggle or anywhere on the row except the checkbox toggles.
+  if (isInteractiveTarget(e.target)) return;
+  toggleExpanded(rowEl.dataset.id);
+}
 
-  row.appendChild(toggle);
-  row.appendChild(cb);
-  row.appendChild(label);
-  wrap.appendChild(row);
-  wrap.appendChild(children);
+function onTreeChange(e){
+  if (!e.target.classList.contains('checkbox')) return;
+  const rowEl = e.target.closest('.vnode');
+  const p = rowEl && state.pagesById.get(rowEl.dataset.id);
+  if (!p || !view) return;
+
+  if (e.target.checked){
+    state.selected.set(p.id, {
+      space_id: p.space_id,
+      page_id: p.id,
+      title: p.title || '',
+      slug_id: p.slug_id || '',
+    });
+  } else {
+    state.selected.delete(p.id);
+  }
+  view.onSelectionChanged();
+}
+
+export function renderTree(elTree, onSelectionChanged){
+  if (view && view.frame) cancelAnimationFrame(view.frame);
+
+  const spacer = document.createElement('div');
+  spacer.className = 'vtree';
+  elTree.replaceChildren(spacer);
+
+  view = { elTree, spacer, onSelectionChanged, rows: [], frame: 0 };
+
+  if (!wired.has(elTree)){
+    wired.add(elTree);
+    elTree.addEventListener('scroll', schedulePaint, { passive: true });
+    elTree.addEventListener('click', onTreeClick);
+    elTree.addEventListener('change', onTreeChange);
+    window.addEventListener('resize', schedulePaint);
+  }
 
-  return wrap;
+  refresh();
 }